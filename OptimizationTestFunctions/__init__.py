@@ -5,6 +5,39 @@ from .functions import Sphere, Ackley, AckleyTest, Rosenbrock, Fletcher, Griewan
 
 from .transformations import Transformation, Noises
 
-from .plot_func import plot_3d
+from .rotations import DenseRotation, HouseholderRotation, GivensRotation, BlockDiagonalRotation
+
+from .evaluation import evaluate_population, evaluate_grid, evaluate_grid_adaptive, evaluate_stream, evaluate_slices
+
+from .instrumentation import Instrumented, BudgetExhausted
+
+from .caching import Cached
+
+from .shared import SharedTables
+
+from .grid_cache import GridCache
+
+from .registry import REGISTRY, FunctionInfo, register, select, make, suite
+
+
+# modules imported on first access only: plotting needs optional dependencies (matplotlib, OppOpPopInit),
+# asyncio interface, process pools and benchmark harness are slow to import and not needed by short-lived workers
+_LAZY = {
+    'plot_3d': 'plot_func',
+    'plot_slices': 'plot_func',
+    'AsyncFunction': 'async_eval',
+    'Latency': 'async_eval',
+    'ParallelEvaluator': 'parallel',
+    'run_benchmark': 'harness',
+    'shift_rotate': 'harness',
+    'BenchmarkResult': 'harness',
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        import importlib
+        return getattr(importlib.import_module(f".{_LAZY[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
@@ -0,0 +1,59 @@
+"""
+Command line interface
+
+    python -m OptimizationTestFunctions render --functions Sphere Rastrigin --resolutions 50 200 --out gallery --workers 4
+    python -m OptimizationTestFunctions render --shift 1 -2 --rotation-seed 3 --cmap hot
+    python -m OptimizationTestFunctions render --resolutions 300 --cache .grid_cache --cmap hot
+"""
+
+import argparse
+
+from .grid_cache import GridCache
+from .gallery import default_functions, render_gallery, transformed
+
+
+def main(args = None):
+
+    parser = argparse.ArgumentParser(prog = 'python -m OptimizationTestFunctions')
+    commands = parser.add_subparsers(dest = 'command', required = True)
+
+    render = commands.add_parser('render', help = 'render plots of functions to files in parallel without display')
+    render.add_argument('--functions', nargs = '+', default = None, help = 'names of functions (default: all)')
+    render.add_argument('--resolutions', nargs = '+', type = int, default = [70], help = 'points by dimension of plots')
+    render.add_argument('--out', default = 'gallery', help = 'output directory')
+    render.add_argument('--workers', type = int, default = None, help = 'count of worker processes')
+    render.add_argument('--shift', nargs = 2, type = float, default = None, help = 'shift functions by vector')
+    render.add_argument('--rotation-seed', type = int, default = None, help = 'rotate functions by random matrix with this seed')
+    render.add_argument('--noise-sd', type = float, default = None, help = 'add normal noise with this standard deviation')
+    render.add_argument('--cmap', default = 'twilight')
+    render.add_argument('--no-surface', action = 'store_true', help = 'plot heatmap only')
+    render.add_argument('--no-heatmap', action = 'store_true', help = 'plot 3D surface only')
+    render.add_argument('--adaptive', type = float, default = None, metavar = 'TOLERANCE', help = 'sample grids adaptively with this relative tolerance')
+    render.add_argument('--cache', default = None, help = 'directory of on-disk cache of computed grids')
+
+    args = parser.parse_args(args)
+
+    if args.command == 'render':
+        funcs = default_functions(2)
+        if args.functions is not None:
+            unknown = set(args.functions) - set(funcs)
+            if unknown:
+                parser.error(f"unknown functions: {sorted(unknown)}")
+            funcs = {name: funcs[name] for name in args.functions}
+
+        funcs = transformed(funcs, shift = args.shift, rotation_seed = args.rotation_seed, noise_sd = args.noise_sd)
+
+        plot_kwargs = {'adaptive_tolerance': args.adaptive}
+        if args.cache is not None:
+            if args.noise_sd is not None:
+                parser.error("grids of noised functions cannot be cached")
+            plot_kwargs['grid_cache'] = GridCache(args.cache)
+
+        paths = render_gallery(funcs, args.resolutions, args.out, n_workers = args.workers,
+                               cmap = args.cmap, plot_surface = not args.no_surface, plot_heatmap = not args.no_heatmap, **plot_kwargs)
+        for path in paths:
+            print(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+#
+# Asyncio interface with simulated cost of evaluation for load testing of asynchronous optimizers
+#
+
+import asyncio
+import functools
+
+import numpy as np
+
+from .evaluation import copy_metadata, evaluate_population
+
+
+def _constant(seconds, per_point, rng, n_points, dim):
+    return seconds + per_point * n_points
+
+def _uniform(low, high, rng, n_points, dim):
+    return rng.uniform(low, high)
+
+def _lognormal(median, sigma, rng, n_points, dim):
+    return median * rng.lognormal(0, sigma)
+
+def _by_dim(base, per_dim, power, per_point, rng, n_points, dim):
+    return base + per_dim * dim**power + per_point * n_points
+
+
+class Latency:
+    """
+    latency models: functions (n_points, dim) -> seconds of one call (of one point or batch of n_points)
+    """
+
+    class Model:
+        def __init__(self, apply, seed = None):
+            self.apply = apply # (generator, n_points, dim) -> seconds
+            self.rng = np.random.default_rng(seed)
+
+        def __call__(self, n_points, dim):
+            return max(0.0, float(self.apply(self.rng, n_points, dim)))
+
+    @staticmethod
+    def constant(seconds = 0.01, per_point = 0.0):
+        """
+        seconds + per_point * n_points
+        """
+        return Latency.Model(functools.partial(_constant, seconds, per_point))
+
+    @staticmethod
+    def uniform(low = 0.005, high = 0.02, seed = None):
+        return Latency.Model(functools.partial(_uniform, low, high), seed)
+
+    @staticmethod
+    def lognormal(median = 0.01, sigma = 0.5, seed = None):
+        """
+        heavy-tailed latency like of real simulations: median * exp(N(0, sigma))
+        """
+        return Latency.Model(functools.partial(_lognormal, median, sigma), seed)
+
+    @staticmethod
+    def by_dim(base = 0.001, per_dim = 1e-5, power = 1, per_point = 0.0):
+        """
+        base + per_dim * dim^power + per_point * n_points
+        """
+        return Latency.Model(functools.partial(_by_dim, base, per_dim, power, per_point))
+
+
+class AsyncFunction:
+
+    def __init__(self, func, latency = None, max_concurrency = None, batch_size = None, batch_wait = 0.001, executor = None):
+        """
+        Wraps function or Transformation object by asyncio interface with simulated evaluation cost
+
+        Parameters
+        ----------
+        func : function or class callable object
+            evaluated function.
+        latency : function/float/None, optional
+            latency model (n_points, dim) -> seconds (see Latency) or constant seconds. The default is None (no latency).
+        max_concurrency : int/None, optional
+            max count of calls evaluated at the same time, others wait in queue. The default is None (no limit).
+        batch_size : int/None, optional
+            if not None, single points of evaluate() are gathered into batches up to batch_size points
+            (like service which evaluates jobs by groups). The default is None.
+        batch_wait : float, optional
+            max seconds of waiting for filling of batch. The default is 0.001.
+        executor : concurrent.futures.Executor/None, optional
+            executor for real computations of func (for slow functions), None means computing in event loop. The default is None.
+
+        """
+        assert (max_concurrency is None or max_concurrency >= 1), f"max_concurrency should be positive or None (got {max_concurrency})"
+        assert (batch_size is None or batch_size >= 1), f"batch_size should be positive or None (got {batch_size})"
+
+        self.func = func
+        self.latency = Latency.constant(latency) if isinstance(latency, (int, float)) else latency
+        self.max_concurrency = max_concurrency
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.executor = executor
+
+        copy_metadata(self, func)
+
+        # state bound to event loop, recreated for each new loop (for example, for each asyncio.run)
+        self._loop = None
+        self._semaphore = None
+        self._pending = []
+        self._timer = None
+        self._tasks = set() # running batches (event loop keeps only weak references to tasks)
+
+        self.reset()
+
+    def reset(self):
+        """
+        clears counters
+        """
+        self.calls = 0
+        self.batches = 0
+        self.evaluations = 0
+        self.simulated_time = 0.0
+        self.running = 0
+        self.max_running = 0
+
+    def _bind_loop(self):
+        """
+        returns running event loop, semaphore and batching state of previous loop are dropped
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = None if self.max_concurrency is None else asyncio.Semaphore(self.max_concurrency)
+            self._pending = []
+            self._timer = None
+            self._tasks = set()
+        return loop
+
+    async def _call(self, arr):
+        """
+        evaluates 2D-array by one simulated call under concurrency limit
+        """
+        self._bind_loop()
+
+        if self._semaphore is not None:
+            await self._semaphore.acquire()
+        try:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+            if self.latency is not None:
+                seconds = self.latency(arr.shape[0], arr.shape[1])
+                self.simulated_time += seconds
+                await asyncio.sleep(seconds)
+
+            if self.executor is None:
+                values = evaluate_population(self.func, arr)
+            else:
+                values = await asyncio.get_running_loop().run_in_executor(self.executor, evaluate_population, self.func, arr)
+
+            self.batches += 1
+            self.evaluations += arr.shape[0]
+            return values
+        finally:
+            self.running -= 1
+            if self._semaphore is not None:
+                self._semaphore.release()
+
+    async def evaluate(self, vec):
+        """
+        value of one point
+        """
+        vec = np.asarray(vec)
+        self.calls += 1
+
+        if self.batch_size is None:
+            return (await self._call(vec[np.newaxis]))[0]
+
+        loop = self._bind_loop()
+        future = loop.create_future()
+        self._pending.append((vec, future))
+
+        if len(self._pending) >= self.batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.batch_wait, self._flush)
+
+        return await future
+
+    async def evaluate_batch(self, arr):
+        """
+        values of population (2D-array) by one simulated call
+        """
+        arr = np.asarray(arr)
+        assert (arr.ndim == 2), f"population should be 2D-array with shape (n_points, dim) (got shape {arr.shape})"
+        self.calls += 1
+        return await self._call(arr)
+
+    def _flush(self):
+
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        items, self._pending = self._pending, []
+        if items:
+            task = asyncio.ensure_future(self._run_batch(items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run_batch(self, items):
+        try:
+            values = await self._call(np.array([vec for vec, _ in items]))
+        except Exception as error:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        for (_, future), value in zip(items, values):
+            if not future.done():
+                future.set_result(value)
+
+    def stats(self):
+        return {
+            'calls': self.calls,
+            'batches': self.batches,
+            'evaluations': self.evaluations,
+            'simulated_time': self.simulated_time,
+            'max_running': self.max_running
+        }
@@ -0,0 +1,143 @@
+
+import sys
+from collections import OrderedDict
+
+import numpy as np
+
+from .evaluation import copy_metadata, evaluate_population
+
+
+# approximate memory of one OrderedDict entry (hash table slot and linked list node, amortized over table growth)
+_ENTRY_OVERHEAD = 104
+
+
+def _entry_bytes(key, value):
+    return sys.getsizeof(key) + sys.getsizeof(value) + _ENTRY_OVERHEAD
+
+
+class Cached:
+
+    def __init__(self, func, max_entries = 100000, max_bytes = None, quantization = None):
+        """
+        Wraps function or Transformation object with memoization and LRU eviction
+
+        Parameters
+        ----------
+        func : function or class callable object
+            evaluated function, noised Transformation objects are not allowed.
+        max_entries : int/None, optional
+            max count of cached points. The default is 100000.
+        max_bytes : int/None, optional
+            max approximate memory of cache (keys, values and dict entries). The default is None (no limit).
+        quantization : float/None, optional
+            step of grid for keys: points in the same grid cell share the cached value. The default is None (exact bytes of point).
+
+        """
+        assert (not getattr(func, 'is_noised', False)), "noised functions cannot be cached!"
+        assert (max_entries is None or max_entries >= 1), f"max_entries should be positive or None (got {max_entries})"
+        assert (quantization is None or quantization > 0), f"quantization should be positive or None (got {quantization})"
+
+        self.func = func
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.quantization = quantization
+
+        copy_metadata(self, func)
+
+        self.clear()
+
+    def clear(self):
+        """
+        removes all cached values and resets statistics
+        """
+        self.cache = OrderedDict()
+        self.nbytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'evictions': self.evictions,
+            'entries': len(self.cache),
+            'nbytes': self.nbytes
+        }
+
+    def _keys(self, arr):
+        """
+        bytes keys for each row of 2D-array
+        """
+        if self.quantization is None:
+            arr = np.ascontiguousarray(arr, dtype = np.float64)
+        else:
+            arr = np.ascontiguousarray(np.round(arr / self.quantization), dtype = np.int64)
+        return [row.tobytes() for row in arr]
+
+    def _put(self, key, value):
+
+        self.cache[key] = value
+        self.nbytes += _entry_bytes(key, value)
+
+        while (self.max_entries is not None and len(self.cache) > self.max_entries) or (self.max_bytes is not None and self.nbytes > self.max_bytes and len(self.cache) > 1):
+            old_key, old_value = self.cache.popitem(last = False)
+            self.nbytes -= _entry_bytes(old_key, old_value)
+            self.evictions += 1
+
+    def __call__(self, vec):
+        vec = np.asarray(vec)
+        if vec.ndim == 2:
+            return self.evaluate_batch(vec)
+
+        key = self._keys(vec[np.newaxis])[0]
+
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        self.misses += 1
+        value = self.func(vec)
+        self._put(key, value)
+
+        return value
+
+    def evaluate_batch(self, arr):
+        """
+        evaluates only cache misses (each unique miss once) by one batched call
+        """
+        arr = np.asarray(arr)
+        assert (arr.ndim == 2), f"population should be 2D-array with shape (n_points, dim) (got shape {arr.shape})"
+
+        keys = self._keys(arr)
+        values = np.empty(len(keys), dtype = getattr(self.func, 'dtype', np.float64))
+
+        miss_rows = {} # key -> rows with this key
+        for i, key in enumerate(keys):
+            if key in self.cache:
+                self.hits += 1
+                self.cache.move_to_end(key)
+                values[i] = self.cache[key]
+            else:
+                miss_rows.setdefault(key, []).append(i)
+
+        if miss_rows:
+            self.misses += sum(len(rows) for rows in miss_rows.values())
+
+            first_rows = [rows[0] for rows in miss_rows.values()]
+            new_values = evaluate_population(self.func, arr[first_rows])
+
+            for (key, rows), value in zip(miss_rows.items(), new_values):
+                values[rows] = value
+                self._put(key, value)
+
+        return values
+
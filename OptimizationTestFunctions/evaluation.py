@@ -0,0 +1,409 @@
+
+import numpy as np
+
+
+def has_batch_path(func):
+    """
+    checks whether func can evaluate whole 2D-array (n_points, dim) by one call
+    """
+    return hasattr(func, 'evaluate_batch')
+
+
+def copy_metadata(wrapper, func):
+    """
+    copies bounds, x_best and f_best of func (which of them exist) to wrapper object
+    """
+    for attr in ('bounds', 'x_best', 'f_best'):
+        if hasattr(func, attr):
+            setattr(wrapper, attr, getattr(func, attr))
+
+
+def evaluate_population(func, arr):
+    """
+    Evaluates function on each row of 2D-array
+
+    Parameters
+    ----------
+    func : function or class callable object
+        evaluated function.
+    arr : numpy 2D-array
+        population with shape (n_points, dim).
+
+    Returns
+    -------
+    numpy 1D-array of n_points values.
+
+    """
+    if has_batch_path(func):
+        return np.asarray(func.evaluate_batch(arr))
+
+    # plain user callable: point by point
+    return np.array([func(vec) for vec in arr], dtype = float)
+
+
+def evaluate_grid(func, bounds, points_by_dim = 50, chunk_size = 2**16):
+    """
+    Evaluates 2D function on uniform grid without plotting
+
+    Parameters
+    ----------
+    func : function or class callable object
+        evaluated function of 2 arguments.
+    bounds : tuple
+        space bounds with structure (xmin, xmax, ymin, ymax).
+    points_by_dim : int, optional
+        points for each dimension (50x50, 100x100...). The default is 50.
+    chunk_size : int, optional
+        max count of points evaluated by one call of func, it bounds the memory of temporary arrays. The default is 2**16.
+
+    Returns
+    -------
+    x : numpy 1D-array
+        grid by first dimension.
+    y : numpy 1D-array
+        grid by second dimension.
+    data : numpy 2D-array
+        function values where data[i, j] = func([x[i], y[j]]).
+
+    """
+
+    assert (chunk_size >= 1), f"chunk_size should be positive (got {chunk_size})"
+
+    xmin, xmax, ymin, ymax = bounds
+
+    x = np.linspace(xmin, xmax, points_by_dim)
+    y = np.linspace(ymin, ymax, points_by_dim)
+
+    data = np.empty((x.size, y.size))
+
+    rows_by_chunk = max(1, chunk_size // y.size)
+    points = np.empty((rows_by_chunk * y.size, 2))
+    points[:, 1] = np.tile(y, rows_by_chunk)
+
+    for start in range(0, x.size, rows_by_chunk):
+        stop = min(start + rows_by_chunk, x.size)
+        count = (stop - start) * y.size
+
+        chunk = points[:count]
+        chunk[:, 0] = np.repeat(x[start:stop], y.size)
+
+        data[start:stop] = evaluate_population(func, chunk).reshape(stop - start, y.size)
+
+    return x, y, data
+
+
+def _bilinear(corners, u, v):
+    """
+    bilinear interpolation by values of cell corners (v00, v10, v01, v11) at relative coordinates u, v in [0, 1]
+    """
+    v00, v10, v01, v11 = corners
+    return (v00 * (1 - u) + v10 * u) * (1 - v) + (v01 * (1 - u) + v11 * u) * v
+
+
+def evaluate_grid_adaptive(func, bounds, points_by_dim = 50, initial_points = 9, tolerance = 0.005, chunk_size = 2**16, return_evaluations = False):
+    """
+    Evaluates 2D function on uniform grid by adaptive quadtree sampling
+
+    Starts from coarse subgrid of about initial_points x initial_points and splits only cells where function
+    differs from bilinear interpolation of cell corners (at center and edge midpoints) by more than
+    tolerance * (range of known values), points of other cells are interpolated.
+    Smooth functions need a few percents of points_by_dim^2 evaluations, multimodal ones are refined where needed
+
+    Parameters
+    ----------
+    func : function or class callable object
+        evaluated function of 2 arguments.
+    bounds : tuple
+        space bounds with structure (xmin, xmax, ymin, ymax).
+    points_by_dim : int, optional
+        points for each dimension of result grid. The default is 50.
+    initial_points : int, optional
+        points for each dimension of the first coarse subgrid. The default is 9.
+    tolerance : float, optional
+        relative interpolation error which needs cell split. The default is 0.005.
+    chunk_size : int, optional
+        max count of points evaluated by one call of func. The default is 2**16.
+    return_evaluations : boolean, optional
+        return also count of evaluated points. The default is False.
+
+    Returns
+    -------
+    x, y, data like evaluate_grid (and count of evaluations if return_evaluations).
+
+    """
+
+    assert (points_by_dim >= 2), f"points_by_dim should be at least 2 (got {points_by_dim})"
+    assert (initial_points >= 2), f"initial_points should be at least 2 (got {initial_points})"
+    assert (tolerance >= 0), f"tolerance should be non-negative (got {tolerance})"
+
+    xmin, xmax, ymin, ymax = bounds
+    size = points_by_dim
+
+    x = np.linspace(xmin, xmax, size)
+    y = np.linspace(ymin, ymax, size)
+
+    values = np.empty((size, size))
+    known = np.zeros((size, size), dtype = bool)
+
+    def evaluate(I, J):
+        """
+        evaluates not known grid points (I, J) by chunks, returns count of evaluated points
+        """
+        flat = np.unique(I * size + J)
+        flat = flat[~known.ravel()[flat]]
+        I, J = np.divmod(flat, size)
+        for start in range(0, flat.size, chunk_size):
+            i, j = I[start:start + chunk_size], J[start:start + chunk_size]
+            values[i, j] = evaluate_population(func, np.column_stack((x[i], y[j])))
+        known[I, J] = True
+        return flat.size
+
+    # cells are index ranges [I0, I1] x [J0, J1] of grid
+    coarse = np.unique(np.linspace(0, size - 1, min(initial_points, size)).round().astype(np.int64))
+    I0, J0 = (arr.ravel() for arr in np.meshgrid(coarse[:-1], coarse[:-1], indexing = 'ij'))
+    I1, J1 = (arr.ravel() for arr in np.meshgrid(coarse[1:], coarse[1:], indexing = 'ij'))
+
+    evaluations = evaluate(np.concatenate((I0, I0, I1, I1)), np.concatenate((J0, J1, J0, J1)))
+
+    def corners(I0, I1, J0, J1):
+        return values[I0, J0], values[I1, J0], values[I0, J1], values[I1, J1]
+
+    leaves = [] # (I0, I1, J0, J1) of cells filled by interpolation
+
+    while I0.size:
+        # cells without inner points are done
+        inner = (I1 - I0 > 1) | (J1 - J0 > 1)
+        leaves.append((I0[~inner], I1[~inner], J0[~inner], J1[~inner]))
+        I0, I1, J0, J1 = I0[inner], I1[inner], J0[inner], J1[inner]
+        if I0.size == 0:
+            break
+
+        MI, MJ = (I0 + I1) // 2, (J0 + J1) // 2
+
+        # center and 4 edge midpoints of each cell
+        PI = np.column_stack((MI, MI, MI, I0, I1))
+        PJ = np.column_stack((MJ, J0, J1, MJ, MJ))
+        evaluations += evaluate(PI.ravel(), PJ.ravel())
+
+        U = (PI - I0[:, np.newaxis]) / (I1 - I0)[:, np.newaxis]
+        V = (PJ - J0[:, np.newaxis]) / (J1 - J0)[:, np.newaxis]
+        predicted = _bilinear([c[:, np.newaxis] for c in corners(I0, I1, J0, J1)], U, V)
+        error = np.abs(values[PI, PJ] - predicted).max(axis = 1)
+
+        known_values = values[known]
+        split = error > tolerance * (known_values.max() - known_values.min())
+
+        leaves.append((I0[~split], I1[~split], J0[~split], J1[~split]))
+
+        # children of split cells (halves with zero width are dropped)
+        I0, I1, J0, J1, MI, MJ = (arr[split] for arr in (I0, I1, J0, J1, MI, MJ))
+        I0, I1, J0, J1 = (
+            np.concatenate((I0, MI, I0, MI)), np.concatenate((MI, I1, MI, I1)),
+            np.concatenate((J0, J0, MJ, MJ)), np.concatenate((MJ, MJ, J1, J1))
+        )
+        valid = (I1 > I0) & (J1 > J0)
+        I0, I1, J0, J1 = I0[valid], I1[valid], J0[valid], J1[valid]
+
+    # fill not evaluated points by groups of cells with the same shape
+    data = values.copy()
+    for I0, I1, J0, J1 in leaves:
+        shapes = np.column_stack((I1 - I0, J1 - J0))
+        for width, height in np.unique(shapes, axis = 0):
+            group = (shapes[:, 0] == width) & (shapes[:, 1] == height)
+            i0, i1, j0, j1 = I0[group], I1[group], J0[group], J1[group]
+
+            di, dj = (arr.ravel() for arr in np.meshgrid(np.arange(width + 1), np.arange(height + 1), indexing = 'ij'))
+            PI = i0[:, np.newaxis] + di
+            PJ = j0[:, np.newaxis] + dj
+
+            interpolated = _bilinear([c[:, np.newaxis] for c in corners(i0, i1, j0, j1)], di / width, dj / height)
+            mask = ~known[PI, PJ]
+            data[PI[mask], PJ[mask]] = interpolated[mask]
+
+    if return_evaluations:
+        return x, y, data, evaluations
+    return x, y, data
+
+def _stream_chunks(source, chunk_size, start):
+    """
+    yields (offset, 2D chunk) of points of source from offset start
+    """
+    if isinstance(source, np.ndarray):
+        for offset in range(start, source.shape[0], chunk_size):
+            # memory-mapped rows are read only here
+            yield offset, np.asarray(source[offset:offset + chunk_size])
+        return
+
+    offset = 0
+    for batch in source:
+        batch = np.asarray(batch)
+        if batch.ndim == 1:
+            batch = batch[np.newaxis]
+        stop = offset + batch.shape[0]
+        if stop > start:
+            batch = batch[max(start - offset, 0):]
+            for i in range(0, batch.shape[0], chunk_size):
+                yield max(start, offset) + i, batch[i:i + chunk_size]
+        offset = stop
+
+
+def evaluate_stream(func, source, out = None, chunk_size = 2**16, start = 0, progress = None, dtype = None):
+    """
+    Evaluates points which cannot be loaded into memory at once by bounded chunks through batched path of func
+
+    Parameters
+    ----------
+    func : function or class callable object
+        evaluated function.
+    source : str/numpy 2D-array/iterable
+        path to .npy file with shape (N, dim) (it is opened by memory mapping), 2D-array (for example, np.memmap)
+        or iterable of batches (2D-arrays or single points).
+    out : str/numpy 1D-array/None, optional
+        where values are written: path to .npy file (created as memory-mapped array, or opened if start > 0)
+        or array of N values. None means returning generator of (offset, values) for each chunk. The default is None.
+    chunk_size : int, optional
+        max count of points evaluated by one call of func. The default is 2**16.
+    start : int, optional
+        offset of the first evaluated point, points before it are skipped (to resume after interruption). The default is 0.
+    progress : function/None, optional
+        function (done, total) -> None called after each chunk is written; done is offset for resuming, total is None for iterables. The default is None.
+    dtype : numpy dtype/None, optional
+        dtype of created output file. The default is None (dtype of func or np.float64).
+
+    Returns
+    -------
+    out array (memory-mapped for path) or generator of (offset, values).
+
+    """
+    assert (chunk_size >= 1), f"chunk_size should be positive (got {chunk_size})"
+    assert (start >= 0), f"start should be non-negative (got {start})"
+
+    if isinstance(source, str):
+        source = np.load(source, mmap_mode = 'r')
+
+    total = source.shape[0] if isinstance(source, np.ndarray) else None
+
+    def values_by_chunks():
+        for offset, chunk in _stream_chunks(source, chunk_size, start):
+            yield offset, evaluate_population(func, chunk)
+
+    if out is None:
+        def generator():
+            for offset, values in values_by_chunks():
+                yield offset, values
+                if progress is not None:
+                    progress(offset + values.size, total)
+        return generator()
+
+    if isinstance(out, str):
+        if start > 0:
+            out = np.load(out, mmap_mode = 'r+')
+        else:
+            assert (total is not None), "count of points of iterable source is unknown, create output array by yourself"
+            out = np.lib.format.open_memmap(out, mode = 'w+', shape = (total,), dtype = getattr(func, 'dtype', np.float64) if dtype is None else dtype)
+
+    for offset, values in values_by_chunks():
+        out[offset:offset + values.size] = values
+        if isinstance(out, np.memmap):
+            # reported offsets are safe for resuming
+            out.flush()
+        if progress is not None:
+            progress(offset + values.size, total)
+
+    return out
+
+def _slice_directions(spec, dim):
+    """
+    pair of direction vectors for slice given by pair of axes indexes or pair of vectors
+    """
+    first, second = spec
+    if np.ndim(first) == 0:
+        assert (0 <= first < dim and 0 <= second < dim and first != second), f"axes of slice should be different and less than dim = {dim} (got {spec})"
+        u, v = np.zeros(dim), np.zeros(dim)
+        u[first], v[second] = 1, 1
+        return u, v
+
+    u, v = np.asarray(first, dtype = float), np.asarray(second, dtype = float)
+    assert (u.shape == (dim,) and v.shape == (dim,)), f"directions of slice should be vectors of dim = {dim}"
+    return u, v
+
+
+def evaluate_slices(func, slices = ((0, 1),), base = None, bounds = None, points_by_dim = 50, chunk_size = 2**16):
+    """
+    Evaluates 2D slices of function of any dimension: all coordinates are fixed at base point except 2 axes (or 2 directions)
+
+    Points of all slices are built by chunks of full dimension and evaluated through batched path
+
+    Parameters
+    ----------
+    func : function or class callable object
+        evaluated function of any dimension.
+    slices : list, optional
+        each slice is pair of axes indexes (i, j) or pair of direction vectors (u, v). The default is ((0, 1),).
+    base : numpy 1D-array/None, optional
+        fixed point of slices. The default is None (func.x_best).
+    bounds : tuple/None, optional
+        bounds (xmin, xmax, ymin, ymax) of slice coordinates: values of axes i and j or coefficients of directions
+        (point is base + x*u + y*v). The default is None (func.bounds for axes, the same width around 0 for directions).
+    points_by_dim : int, optional
+        points for each dimension of slice grid. The default is 50.
+    chunk_size : int, optional
+        max count of points evaluated by one call of func. The default is 2**16.
+
+    Returns
+    -------
+    x : numpy 2D-array
+        grids by first slice coordinate, one row for each slice.
+    y : numpy 2D-array
+        grids by second slice coordinate, one row for each slice.
+    data : numpy 3D-array
+        function values where data[k, i, j] = func(point of slice k with coordinates x[k, i], y[k, j]).
+
+    """
+    assert (chunk_size >= 1), f"chunk_size should be positive (got {chunk_size})"
+
+    if base is None:
+        base = getattr(func, 'x_best', None)
+        assert (base is not None), "function has no x_best, base point of slices is needed"
+    base = np.asarray(base, dtype = float)
+    dim = base.size
+
+    n = points_by_dim
+    count = len(slices)
+
+    U = np.empty((count, dim))
+    V = np.empty((count, dim))
+    x = np.empty((count, n))
+    y = np.empty((count, n))
+    origin = np.empty((count, dim))
+
+    for k, spec in enumerate(slices):
+        U[k], V[k] = _slice_directions(spec, dim)
+        by_axes = np.ndim(spec[0]) == 0
+
+        if bounds is not None:
+            xmin, xmax, ymin, ymax = bounds
+        else:
+            xmin, xmax, ymin, ymax = func.bounds
+            if not by_axes:
+                xmin, xmax, ymin, ymax = -(xmax - xmin) / 2, (xmax - xmin) / 2, -(ymax - ymin) / 2, (ymax - ymin) / 2
+
+        x[k] = np.linspace(xmin, xmax, n)
+        y[k] = np.linspace(ymin, ymax, n)
+
+        # for axes coordinates of base along them are replaced by grid values
+        origin[k] = base - U[k] * (U[k] @ base) - V[k] * (V[k] @ base) if by_axes else base
+
+    total = count * n * n
+    values = np.empty(total)
+
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        index = np.arange(start, stop)
+        k, rest = np.divmod(index, n * n)
+        i, j = np.divmod(rest, n)
+
+        points = origin[k] + x[k, i][:, np.newaxis] * U[k] + y[k, j][:, np.newaxis] * V[k]
+        values[start:stop] = evaluate_population(func, points)
+
+    return x, y, values.reshape(count, n, n)
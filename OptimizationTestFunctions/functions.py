@@ -6,7 +6,11 @@
 
 
 
+import functools
 import math
+import os
+import weakref
+
 import numpy as np
 
 
@@ -16,34 +20,285 @@ def easy_bounds(bound):
 def check_dim(dim, min = 1):
     assert (type(dim) == int and dim >=min), f"Dimension should be int and not less than {min} for this function (got {dim})"
 
+def pairs_grad(dx, dy):
+    """
+    gathers gradient of sum of terms t(x_i, x_{i+1}) from partial derivatives by x_i (dx) and by x_{i+1} (dy)
+    """
+    g = np.zeros(dx.shape[:-1] + (dx.shape[-1] + 1,), dtype = dx.dtype)
+    g[..., :-1] += dx
+    g[..., 1:] += dy
+    return g
+
+def sqrt_abs_derivative(u):
+    """
+    derivative of sqrt(|u|) with 0 at u == 0
+    """
+    r = np.sqrt(np.abs(u))
+    return np.divide(np.sign(u), 2*r, out = np.zeros_like(r), where = r > 0)
+
+
+BACKENDS = ('numpy', 'numba')
+
+# default backend of all functions, can be selected by OPTIMIZATION_TEST_FUNCTIONS_BACKEND environment variable
+DEFAULT_BACKEND = os.environ.get('OPTIMIZATION_TEST_FUNCTIONS_BACKEND', 'numpy')
+assert (DEFAULT_BACKEND in BACKENDS), f"unknown backend {DEFAULT_BACKEND}, available: {BACKENDS}"
+
+
+class IncrementalState:
+    """
+    state of incremental evaluation: current point, its value and sums of terms of function
+    """
+    def __init__(self, x, value, coordinate_sums, pair_sums):
+        self.x = x
+        self.value = value
+        self.coordinate_sums = coordinate_sums
+        self.pair_sums = pair_sums
+        self.updates = 0
+
+
+class BaseFunction:
+    """
+    Base class of test functions.
+
+    Subclasses implement `_evaluate(vec)` using numpy operations by the last axis,
+    so the same formula works for one point (1D-array) and for population (2D-array (n_points, dim))
+
+    For incremental evaluation subclasses describe value as `_combine` of sums of terms
+    of single coordinates (`_coordinate_terms`) and/or of neighbor pairs (x_i, x_{i+1}) (`_pair_terms`)
+    """
+
+    backend = DEFAULT_BACKEND
+
+    # dtype of tables and computations (inputs are converted to it)
+    dtype = np.dtype(np.float64)
+
+    def __getstate__(self):
+        # arrays in shared tables are pickled as references
+        from .shared import pack_state
+        return pack_state(self.__dict__)
+
+    def __setstate__(self, state):
+        from .shared import unpack_state
+        self.__dict__.update(unpack_state(state))
+
+    def set_backend(self, backend):
+        """
+        selects 'numpy' or 'numba' (compiled kernels from jit module) backend for this object, returns the object
+        """
+        assert (backend in BACKENDS), f"unknown backend {backend}, available: {BACKENDS}"
+        self.backend = backend
+        return self
+
+    def _jit_evaluate(self, vec):
+        """
+        evaluates by compiled kernel or returns None if it is not available
+        """
+        from . import jit
+
+        kernel = jit.get_kernel(type(self).__name__)
+        if kernel is None:
+            return None
+        kernel, get_params = kernel
+
+        params = get_params(self)
+        if params is None:
+            return None
+
+        values = kernel(np.ascontiguousarray(vec.reshape(-1, vec.shape[-1])), *params).astype(self.dtype, copy = False)
+        return values[0] if vec.ndim == 1 else values.reshape(vec.shape[:-1])
 
-class Sphere:
+    def __call__(self, vec):
+        vec = np.asarray(vec, dtype = self.dtype)
+        if self.backend == 'numba':
+            values = self._jit_evaluate(vec)
+            if values is not None:
+                return values
+        return self._evaluate(vec)
+
+    def evaluate_batch(self, arr):
+        """
+        evaluates function on each row of 2D-array (n_points, dim) and returns 1D-array of n_points values
+        """
+        arr = np.asarray(arr, dtype = self.dtype)
+        assert (arr.ndim == 2), f"population should be 2D-array with shape (n_points, dim) (got shape {arr.shape})"
+        return self(arr)
+
+    def grad(self, vec):
+        """
+        analytic gradient for 1D-array (point) or 2D-array (n_points, dim) of points
+        """
+        return self.value_and_grad(vec)[1]
+
+    def value_and_grad(self, vec):
+        """
+        returns function value and gradient computed with shared intermediate arrays
+        (for 2D-array: 1D-array of values and 2D-array of gradients)
+        """
+        return self._value_and_grad(np.asarray(vec, dtype = self.dtype))
+
+    def _value_and_grad(self, vec):
+        raise NotImplementedError(f"{type(self).__name__} has no analytic gradient")
+
+    #
+    # incremental evaluation
+    #
+
+    # count of updates after which sums of state are recomputed from scratch (against accumulation of rounding errors)
+    refresh_every = 100000
+
+    def _coordinate_terms(self, values, indices):
+        """
+        terms of coordinates values with indices: array (k,) or (k, components), None if not used
+        """
+        return None
+
+    def _pair_terms(self, x, y, indices):
+        """
+        terms of neighbor pairs (x_i, x_{i+1}) with indices i: array (k,) or (k, components), None if not used
+        """
+        return None
+
+    def _combine(self, coordinate_sums, pair_sums, vec):
+        """
+        value from sums of terms (vec is full point for O(1) terms of boundary coordinates)
+        """
+        return sum(float(np.sum(sums)) for sums in (coordinate_sums, pair_sums) if sums is not None)
+
+    @property
+    def supports_incremental(self):
+        vec = np.zeros(2, dtype = self.dtype)
+        index = np.zeros(1, dtype = np.int64)
+        return self._coordinate_terms(vec[:1], index) is not None or self._pair_terms(vec[:1], vec[1:], index) is not None
+
+    def _term_sums(self, x, indices, pairs):
+        if pairs:
+            terms = self._pair_terms(x[indices], x[indices + 1], indices)
+        else:
+            terms = self._coordinate_terms(x[indices], indices)
+        if terms is None:
+            return None
+        return np.asarray(terms, dtype = np.float64).reshape(indices.size, -1).sum(axis = 0)
+
+    def incremental_state(self, vec):
+        """
+        creates state for incremental evaluation of point (1D-array) by `update`
+        """
+        x = np.array(vec, dtype = self.dtype)
+        assert (x.ndim == 1), f"point should be 1D-array (got shape {x.shape})"
+
+        indices = np.arange(x.size)
+        coordinate_sums = self._term_sums(x, indices, False)
+        pair_sums = self._term_sums(x, indices[:-1], True)
+
+        if coordinate_sums is None and pair_sums is None:
+            value = float(self(x))
+        else:
+            value = self._combine(coordinate_sums, pair_sums, x)
+
+        return IncrementalState(x, value, coordinate_sums, pair_sums)
+
+    def update(self, state, indices, values):
+        """
+        changes coordinates with indices of state point to values and returns new value
+
+        takes O(k) for k changed coordinates if function is sum of terms of coordinates and/or neighbor pairs
+        (see supports_incremental), other functions are evaluated fully
+
+        Parameters
+        ----------
+        state : IncrementalState
+            state from incremental_state (it is changed in place).
+        indices : int/1D-array of int
+            changed coordinates (for repeated indices the last value is used).
+        values : float/1D-array
+            new values of these coordinates.
+
+        Returns
+        -------
+        new value of function.
+
+        """
+        indices = np.atleast_1d(np.asarray(indices, dtype = np.int64))
+        values = np.broadcast_to(np.asarray(values, dtype = self.dtype), indices.shape)
+        if indices.size == 0:
+            return state.value
+
+        x = state.x
+        dim = x.size
+        indices = np.where(indices < 0, indices + dim, indices)
+        if np.unique(indices).size != indices.size:
+            last = np.unique(indices[::-1], return_index = True)[1]
+            indices, values = indices[::-1][last], values[::-1][last]
+
+        if state.coordinate_sums is None and state.pair_sums is None:
+            x[indices] = values
+            state.value = float(self(x))
+            return state.value
+
+        state.updates += 1
+        if state.updates >= self.refresh_every:
+            x[indices] = values
+            fresh = self.incremental_state(x)
+            state.coordinate_sums, state.pair_sums, state.value, state.updates = fresh.coordinate_sums, fresh.pair_sums, fresh.value, 0
+            return state.value
+
+        if state.pair_sums is not None:
+            # pairs (i-1, i) and (i, i+1) of changed coordinates
+            pairs = np.unique(np.concatenate((indices - 1, indices)))
+            pairs = pairs[(pairs >= 0) & (pairs < dim - 1)]
+            state.pair_sums = state.pair_sums - self._term_sums(x, pairs, True)
+
+        if state.coordinate_sums is not None:
+            state.coordinate_sums = state.coordinate_sums - self._term_sums(x, indices, False)
+
+        x[indices] = values
+
+        if state.coordinate_sums is not None:
+            state.coordinate_sums = state.coordinate_sums + self._term_sums(x, indices, False)
+        if state.pair_sums is not None:
+            state.pair_sums = state.pair_sums + self._term_sums(x, pairs, True)
+
+        state.value = self._combine(state.coordinate_sums, state.pair_sums, x)
+        return state.value
+
+
+class Sphere(BaseFunction):
 
     b = 5.12
 
-    def __init__(self, dim, degree = 2):
+    def __init__(self, dim, degree = 2, dtype = np.float64):
 
         check_dim(dim, 1)
+        self.dtype = np.dtype(dtype)
 
         self.deg = degree
-        self.x_best = np.zeros(dim) if degree % 2 == 0 else None
+        self.x_best = np.zeros(dim, dtype = self.dtype) if degree % 2 == 0 else None
         self.f_best = 0 if not (self.x_best is None) else None
 
         self.bounds = easy_bounds(Sphere.b)
     
-    def __call__(self, vec):
-        return sum((x**self.deg for x in vec))
+    def _evaluate(self, vec):
+        return np.sum(vec**self.deg, axis = -1)
+
+    def _value_and_grad(self, vec):
+        p = vec**(self.deg - 1)
+        return np.sum(p*vec, axis = -1), self.deg * p
+
+    def _coordinate_terms(self, values, indices):
+        return values**self.deg
 
 
-class Ackley:
+
+class Ackley(BaseFunction):
     
     b = 3
 
-    def __init__(self, dim):
+    def __init__(self, dim, dtype = np.float64):
 
         check_dim(dim, 1)
+        self.dtype = np.dtype(dtype)
 
-        self.x_best = np.zeros(dim)
+        self.x_best = np.zeros(dim, dtype = self.dtype)
         self.f_best = 0
 
         self.bounds = easy_bounds(Ackley.b)
@@ -51,19 +306,41 @@ class Ackley:
         self.bias = 20 + math.e
         self.pi2 = 2 * math.pi
     
-    def __call__(self, vec):
+    def _evaluate(self, vec):
+
+        s1 = np.sum(vec*vec, axis = -1)/vec.shape[-1]
+        s2 = np.sum(np.cos(self.pi2 * vec), axis = -1)/vec.shape[-1]
+        return self.bias - 20*np.exp(-0.2*np.sqrt(s1)) - np.exp(s2)
+
+    def _value_and_grad(self, vec):
+
+        n = vec.shape[-1]
+        r = np.sqrt(np.sum(vec*vec, axis = -1)/n)
+        e1 = np.exp(-0.2*r)
+        e2 = np.exp(np.sum(np.cos(self.pi2 * vec), axis = -1)/n)
 
-        s1 = sum((x*x for x in vec))/vec.size
-        s2 = sum((math.cos(self.pi2 * x) for x in vec))/vec.size
-        return self.bias - 20*math.exp(-0.2*math.sqrt(s1)) - math.exp(s2)
+        dr = np.divide(vec, n*r[..., np.newaxis], out = np.zeros_like(vec), where = r[..., np.newaxis] > 0)
+        g = 4 * e1[..., np.newaxis] * dr + e2[..., np.newaxis] * self.pi2 * np.sin(self.pi2 * vec) / n
 
-class AckleyTest:
+        return self.bias - 20*e1 - e2, g
+
+    def _coordinate_terms(self, values, indices):
+        return np.column_stack((values*values, np.cos(self.pi2 * values)))
+
+    def _combine(self, coordinate_sums, pair_sums, vec):
+        n = vec.size
+        return self.bias - 20*math.exp(-0.2*math.sqrt(max(coordinate_sums[0], 0)/n)) - math.exp(coordinate_sums[1]/n)
+
+
+
+class AckleyTest(BaseFunction):
     
     b = 30
 
-    def __init__(self, dim):
+    def __init__(self, dim, dtype = np.float64):
 
         check_dim(dim, 2)
+        self.dtype = np.dtype(dtype)
 
         self.x_best = None
         self.f_best = None
@@ -72,96 +349,292 @@ class AckleyTest:
 
         self.exp = math.exp(-0.2)
     
-    def __call__(self, vec):
+    def _evaluate(self, vec):
+
+        x, y = vec[..., :-1], vec[..., 1:]
 
-        s = sum((3*(math.cos(2*vec[i]) + math.sin(2*vec[i+1])) + self.exp * math.sqrt(vec[i]**2 + vec[i+1]**2) for i in range(vec.size-1)))
+        s = np.sum(3*(np.cos(2*x) + np.sin(2*y)) + self.exp * np.sqrt(x*x + y*y), axis = -1)
 
         return s
 
+    def _value_and_grad(self, vec):
+
+        x, y = vec[..., :-1], vec[..., 1:]
+        rho = np.sqrt(x*x + y*y)
+        drho_x = np.divide(x, rho, out = np.zeros_like(rho), where = rho > 0)
+        drho_y = np.divide(y, rho, out = np.zeros_like(rho), where = rho > 0)
+
+        s = np.sum(3*(np.cos(2*x) + np.sin(2*y)) + self.exp * rho, axis = -1)
+        g = pairs_grad(-6*np.sin(2*x) + self.exp * drho_x, 6*np.cos(2*y) + self.exp * drho_y)
 
-class Rosenbrock:
+        return s, g
+
+    def _pair_terms(self, x, y, indices):
+        return 3*(np.cos(2*x) + np.sin(2*y)) + self.exp * np.sqrt(x*x + y*y)
+
+
+
+class Rosenbrock(BaseFunction):
     
     b = 2.048
 
-    def __init__(self, dim):
+    def __init__(self, dim, dtype = np.float64):
 
         check_dim(dim, 2)
+        self.dtype = np.dtype(dtype)
 
-        self.x_best = np.ones(dim)
+        self.x_best = np.ones(dim, dtype = self.dtype)
         self.f_best = 0
 
         self.bounds = easy_bounds(Rosenbrock.b)
 
     
-    def __call__(self, vec):
+    def _evaluate(self, vec):
 
-        s = sum(( 100 * (vec[i+1] - vec[i]**2) ** 2 + (vec[i] - 1)**2 for i in range(vec.size-1)))
+        x, y = vec[..., :-1], vec[..., 1:]
+
+        s = np.sum(100 * (y - x*x) ** 2 + (x - 1)**2, axis = -1)
 
         return s
 
-class Fletcher:
-    
-    b = math.pi
+    def _value_and_grad(self, vec):
 
-    def __init__(self, dim, seed = None):
+        x, y = vec[..., :-1], vec[..., 1:]
+        d = y - x*x
 
-        if seed != None:
-            np.random.seed(seed)
+        s = np.sum(100 * d ** 2 + (x - 1)**2, axis = -1)
+        g = pairs_grad(-400 * x * d + 2 * (x - 1), 200 * d)
 
-        check_dim(dim, 1)
+        return s, g
 
-        self.x_best = np.random.uniform(-np.pi, np.pi, dim)
-        self.f_best = 0
-        self.bounds = easy_bounds(Fletcher.b)
+    def _pair_terms(self, x, y, indices):
+        return 100 * (y - x*x) ** 2 + (x - 1)**2
 
-        self.a = np.random.uniform(-100, 100, (dim, dim))
-        self.b = np.random.uniform(-100, 100, (dim, dim))
 
-        self.A = np.sum(self.a * np.sin(self.x_best) + self.b * np.cos(self.x_best), axis = 0)
 
+class Fletcher(BaseFunction):
+    
+    b = math.pi
 
-        
+    def __init__(self, dim, seed = None, mode = 'sum', storage = 'memory', block_size = 1024, mmap_dir = None, dtype = np.float64):
+        """
+        Parameters
+        ----------
+        dim : int
+            dimension.
+        seed : int/None, optional
+            random seed of matrices and optimum. The default is None.
+        mode : str, optional
+            'sum' -- B = np.sum(a * sin(x) + b * cos(x), axis = 0) (only column sums of matrices are needed, classic behavior of this package);
+            'matrix' -- B = a @ sin(x) + b @ cos(x) evaluated by blocks of matrices rows. The default is 'sum'.
+        storage : str, optional
+            'memory' -- dense matrices in memory;
+            'mmap' -- matrices in read-only memory-mapped files (in mmap_dir or temporary directory);
+            'lazy' -- matrices are not stored, their blocks are regenerated from seed when needed. The default is 'memory'.
+        block_size : int, optional
+            count of matrices rows generated/used at once for 'mmap' and 'lazy' storages and 'matrix' mode
+            (only memory and speed setting, it doesn't change matrices). The default is 1024.
+        mmap_dir : str/None, optional
+            directory for memory-mapped matrices: files are named by (dim, seed, dtype), kept after the object
+            and reused by next objects with the same parameters. The default is None (temporary directory removed with the object).
+        dtype : numpy float dtype, optional
+            dtype of matrices, tables and results. The default is np.float64.
+
+        Matrices are defined by dim, seed and storage kind: 'memory' uses numpy global-compatible stream of seed, 'mmap' and 'lazy'
+        generate each row by own random stream of (seed, matrix, row), so they are the same for both these storages but differ
+        from 'memory' ones for the same seed.
+        """
+
+        assert (mode in ('sum', 'matrix')), f"mode should be 'sum' or 'matrix' (got {mode})"
+        assert (storage in ('memory', 'mmap', 'lazy')), f"storage should be 'memory', 'mmap' or 'lazy' (got {storage})"
+
+        # local random state with the same stream as np.random.seed(seed) without changing global state
+        rng = np.random if seed is None else np.random.RandomState(seed)
 
-    
-    def __call__(self, vec):
+        check_dim(dim, 1)
+        self.dtype = np.dtype(dtype)
+
+        self.mode = mode
+        self.storage = storage
+        self.block_size = block_size
+
+        self.x_best = rng.uniform(-np.pi, np.pi, dim).astype(self.dtype)
+        self.f_best = 0
+        self.bounds = easy_bounds(Fletcher.b)
+
+        if storage == 'memory':
+            self.block_seed = seed
+            self.a = rng.uniform(-100, 100, (dim, dim)).astype(self.dtype, copy = False)
+            self.b = rng.uniform(-100, 100, (dim, dim)).astype(self.dtype, copy = False)
+        else:
+            # seed of blocks random streams (drawn after x_best, so global stream of 'memory' storage is not changed)
+            self.block_seed = rng.randint(2**31) if seed is None else seed
+            self.a = None
+            self.b = None
+
+        if storage == 'mmap':
+            import shutil
+            import tempfile
+            if mmap_dir is None:
+                mmap_dir = tempfile.mkdtemp(prefix = 'fletcher_')
+                # temporary files live while the object lives
+                weakref.finalize(self, shutil.rmtree, mmap_dir, True)
+
+            self.a, self.b = (self._mmap_matrix(mmap_dir, index) for index in (0, 1))
+
+        self.sum_a = np.zeros(dim, dtype = self.dtype)
+        self.sum_b = np.zeros(dim, dtype = self.dtype)
+        for start, stop in self._row_blocks():
+            self.sum_a += self._block(0, start, stop).sum(axis = 0)
+            self.sum_b += self._block(1, start, stop).sum(axis = 0)
+
+        # B at x_best is cached once
+        self.A = self._B(self.x_best)
+
+    def _mmap_matrix(self, directory, matrix_index):
+        """
+        read-only memory-mapped matrix a (matrix_index = 0) or b (matrix_index = 1),
+        files are named by parameters defining matrices, so existing file is reused
+        """
+        import tempfile
+
+        dim = self.x_best.size
+        path = os.path.join(directory, f"fletcher_{'ab'[matrix_index]}_{dim}_{self.block_seed}_{self.dtype.name}.dat")
+
+        if not (os.path.exists(path) and os.path.getsize(path) == dim * dim * self.dtype.itemsize):
+            # write to temporary file first, so other instances never open incomplete matrix
+            fd, tmp = tempfile.mkstemp(suffix = '.tmp', dir = directory)
+            os.close(fd)
+            matrix = np.memmap(tmp, dtype = self.dtype, mode = 'w+', shape = (dim, dim))
+            for start, stop in self._row_blocks():
+                matrix[start:stop] = self._generate_block(matrix_index, start, stop)
+            matrix.flush()
+            del matrix
+            os.replace(tmp, path)
+
+        return np.memmap(path, dtype = self.dtype, mode = 'r', shape = (dim, dim))
+
+    def _row_blocks(self):
+        dim = self.x_best.size
+        return [(start, min(start + self.block_size, dim)) for start in range(0, dim, self.block_size)]
+
+    def _generate_block(self, matrix_index, start, stop):
+        # each row has own random stream, so matrices don't depend on block_size
+        block = np.empty((stop - start, self.x_best.size), dtype = self.dtype)
+        for row in range(start, stop):
+            block[row - start] = np.random.default_rng([self.block_seed, matrix_index, row]).uniform(-100, 100, self.x_best.size)
+        return block
+
+    def _block(self, matrix_index, start, stop):
+        """
+        rows start:stop of matrix a (matrix_index = 0) or b (matrix_index = 1)
+        """
+        if self.storage == 'lazy':
+            return self._generate_block(matrix_index, start, stop)
+        return (self.a, self.b)[matrix_index][start:stop]
+
+    def _B(self, vec, sin = None, cos = None):
+
+        sin = np.sin(vec) if sin is None else sin
+        cos = np.cos(vec) if cos is None else cos
+
+        if self.mode == 'sum':
+            # np.sum(a * sin(vec), axis = 0) == sin(vec) * column sums of a
+            return sin * self.sum_a + cos * self.sum_b
+
+        B = np.empty(vec.shape, dtype = vec.dtype)
+        for start, stop in self._row_blocks():
+            B[..., start:stop] = sin @ self._block(0, start, stop).T + cos @ self._block(1, start, stop).T
+        return B
+
+    def _evaluate(self, vec):
+
+        return np.sum((self.A - self._B(vec))**2, axis = -1)
+
+    def _value_and_grad(self, vec):
+
+        sin, cos = np.sin(vec), np.cos(vec)
+        diff = self.A - self._B(vec, sin, cos)
+
+        if self.mode == 'sum':
+            return np.sum(diff**2, axis = -1), -2 * diff * (cos * self.sum_a - sin * self.sum_b)
+
+        # d/dx_j = -2 * (cos_j * (a.T @ diff)_j - sin_j * (b.T @ diff)_j)
+        at_diff = np.zeros(vec.shape, dtype = vec.dtype)
+        bt_diff = np.zeros(vec.shape, dtype = vec.dtype)
+        for start, stop in self._row_blocks():
+            at_diff += diff[..., start:stop] @ self._block(0, start, stop)
+            bt_diff += diff[..., start:stop] @ self._block(1, start, stop)
+
+        return np.sum(diff**2, axis = -1), -2 * (cos * at_diff - sin * bt_diff)
+
+    def _coordinate_terms(self, values, indices):
+        if self.mode != 'sum':
+            return None
+        return (self.A[indices] - np.sin(values) * self.sum_a[indices] - np.cos(values) * self.sum_b[indices])**2
 
-        B = np.sum(self.a * np.sin(vec) + self.b * np.cos(vec) ,axis = 0)
-        #raise Exception()
-        return  sum((a-b)**2 for a, b in zip(self.A, B))
 
 
-class Griewank:
+class Griewank(BaseFunction):
     
     b = 600
 
-    def __init__(self, dim):
+    def __init__(self, dim, dtype = np.float64):
 
         check_dim(dim, 1)
+        self.dtype = np.dtype(dtype)
 
-        self.x_best = np.zeros(dim)
+        self.x_best = np.zeros(dim, dtype = self.dtype)
         self.f_best = 0
 
         self.bounds = easy_bounds(Griewank.b)
 
     
-    def __call__(self, vec):
+    def _evaluate(self, vec):
 
-        s = sum(( x*x for x in vec))/4000
-        p = math.prod((math.cos(x/math.sqrt(i+1)) for i, x in enumerate(vec)))
+        s = np.sum(vec*vec, axis = -1)/4000
+        p = np.prod(np.cos(vec/np.sqrt(np.arange(1, vec.shape[-1] + 1, dtype = vec.dtype))), axis = -1)
 
         return 1 + s - p
 
+    def _value_and_grad(self, vec):
+
+        sq = np.sqrt(np.arange(1, vec.shape[-1] + 1, dtype = vec.dtype))
+        c = np.cos(vec/sq)
+
+        # products of all cosines except current one (without division by zero cosines)
+        ones = np.ones(c.shape[:-1] + (1,), dtype = c.dtype)
+        left = np.cumprod(np.concatenate((ones, c[..., :-1]), axis = -1), axis = -1)
+        right = np.cumprod(np.concatenate((ones, c[..., :0:-1]), axis = -1), axis = -1)[..., ::-1]
+
+        s = 1 + np.sum(vec*vec, axis = -1)/4000 - left[..., -1] * c[..., -1]
+        g = vec/2000 + left * right * np.sin(vec/sq) / sq
+
+        return s, g
+
+    def _coordinate_terms(self, values, indices):
+        # product of cosines is kept as sum of logarithms of moduli, count of negative and count of zero factors
+        c = np.cos(values/np.sqrt(indices + 1))
+        zero = c == 0
+        return np.column_stack((values*values/4000, np.log(np.abs(np.where(zero, 1, c))), c < 0, zero))
+
+    def _combine(self, coordinate_sums, pair_sums, vec):
+        s, log_p, negative, zero = coordinate_sums
+        p = 0.0 if round(zero) > 0 else (-1)**round(negative) * math.exp(log_p)
+        return 1 + s - p
 
 
-class Penalty2:
+
+class Penalty2(BaseFunction):
     
     b = 50
 
-    def __init__(self, dim, a=5, k=100, m=4):
+    def __init__(self, dim, a=5, k=100, m=4, dtype = np.float64):
 
         check_dim(dim, 2)
+        self.dtype = np.dtype(dtype)
 
-        self.x_best = np.ones(dim)
+        self.x_best = np.ones(dim, dtype = self.dtype)
         self.f_best = 0
 
         self.bounds = easy_bounds(Penalty2.b)
@@ -171,50 +644,99 @@ class Penalty2:
         self.pi3 = 3 * math.pi
 
     
-    def __call__(self, vec):
+    def _evaluate(self, vec):
 
         a, k, m = self.a, self.k, self.m
 
-        u = np.sum((vec[vec>a]-a)**m) + np.sum((-vec[vec<-a]-a)**m)
+        u = np.sum(np.maximum(vec - a, 0)**m + np.maximum(-vec - a, 0)**m, axis = -1)
 
-        s1 = 10 * math.sin(self.pi3*vec[0])**2 + (vec[-1]-1)**2 * (1 + math.sin(self.pi2 * vec[-1]**2))
+        first, last = vec[..., 0], vec[..., -1]
+        s1 = 10 * np.sin(self.pi3*first)**2 + (last-1)**2 * (1 + np.sin(self.pi2 * last**2))
 
-        s2 = sum(((vec[i]-1)**2 * (1 + math.sin(self.pi3 * vec[i+1]**2)) for i in range(vec.size-1)))
+        x, y = vec[..., :-1], vec[..., 1:]
+        s2 = np.sum((x-1)**2 * (1 + np.sin(self.pi3 * y*y)), axis = -1)
 
         return k*u + 0.1 * (s1 + s2)
 
+    def _value_and_grad(self, vec):
+
+        a, k, m = self.a, self.k, self.m
+
+        up, down = np.maximum(vec - a, 0), np.maximum(-vec - a, 0)
+        u = np.sum(up**m + down**m, axis = -1)
+        du = m * (up**(m - 1) * (vec > a) - down**(m - 1) * (vec < -a))
+
+        first, last = vec[..., 0], vec[..., -1]
+        sin_first = np.sin(self.pi3*first)
+        last_sq = last*last
+        s1 = 10 * sin_first**2 + (last-1)**2 * (1 + np.sin(self.pi2 * last_sq))
+
+        x, y = vec[..., :-1], vec[..., 1:]
+        y_sin = 1 + np.sin(self.pi3 * y*y)
+        s2 = np.sum((x-1)**2 * y_sin, axis = -1)
+
+        ds = pairs_grad(2 * (x-1) * y_sin, (x-1)**2 * np.cos(self.pi3 * y*y) * 2 * self.pi3 * y)
+        ds[..., 0] += 20 * self.pi3 * sin_first * np.cos(self.pi3*first)
+        ds[..., -1] += 2 * (last-1) * (1 + np.sin(self.pi2 * last_sq)) + (last-1)**2 * np.cos(self.pi2 * last_sq) * 2 * self.pi2 * last
+
+        return k*u + 0.1 * (s1 + s2), k*du + 0.1 * ds
 
-class Quartic:
+    def _coordinate_terms(self, values, indices):
+        return np.maximum(values - self.a, 0)**self.m + np.maximum(-values - self.a, 0)**self.m
+
+    def _pair_terms(self, x, y, indices):
+        return (x-1)**2 * (1 + np.sin(self.pi3 * y*y))
+
+    def _combine(self, coordinate_sums, pair_sums, vec):
+        first, last = float(vec[0]), float(vec[-1])
+        s1 = 10 * math.sin(self.pi3*first)**2 + (last-1)**2 * (1 + math.sin(self.pi2 * last**2))
+        return self.k*coordinate_sums[0] + 0.1 * (s1 + pair_sums[0])
+
+
+
+class Quartic(BaseFunction):
     
     b = 1.28
 
-    def __init__(self, dim):
+    def __init__(self, dim, dtype = np.float64):
 
         check_dim(dim, 1)
+        self.dtype = np.dtype(dtype)
 
-        self.x_best = np.zeros(dim)
+        self.x_best = np.zeros(dim, dtype = self.dtype)
         self.f_best = 0
 
         self.bounds = easy_bounds(Quartic.b)
 
     
-    def __call__(self, vec):
+    def _evaluate(self, vec):
 
-        s = sum(( (i+1)*x**4 for i, x in enumerate(vec)))
+        s = np.sum(np.arange(1, vec.shape[-1] + 1, dtype = vec.dtype) * vec**4, axis = -1)
 
         return s
 
+    def _value_and_grad(self, vec):
+
+        i = np.arange(1, vec.shape[-1] + 1, dtype = vec.dtype)
+        cube = vec**3
+
+        return np.sum(i * cube * vec, axis = -1), 4 * i * cube
+
+    def _coordinate_terms(self, values, indices):
+        return (indices + 1) * values**4
 
 
-class Rastrigin:
+
+class Rastrigin(BaseFunction):
     
     b = 5.12
 
-    def __init__(self, dim):
+    def __init__(self, dim, dtype = np.float64):
 
         check_dim(dim, 1)
+        self.dtype = np.dtype(dtype)
 
-        self.x_best = np.zeros(dim)
+        self.x_best = np.zeros(dim, dtype = self.dtype)
         self.f_best = 0
 
         self.bounds = easy_bounds(Rastrigin.b)
@@ -224,130 +746,195 @@ class Rastrigin:
         self.bias = 10*dim
 
     
-    def __call__(self, vec):
+    def _evaluate(self, vec):
 
-        s = sum(( x*x - math.cos(self.pi2*x)*10 for x in vec))
+        s = np.sum(vec*vec - np.cos(self.pi2*vec)*10, axis = -1)
 
         return self.bias + s
 
+    def _value_and_grad(self, vec):
+
+        arg = self.pi2*vec
+
+        s = np.sum(vec*vec - np.cos(arg)*10, axis = -1)
+
+        return self.bias + s, 2*vec + 10*self.pi2*np.sin(arg)
+
+    def _coordinate_terms(self, values, indices):
+        return values*values - np.cos(self.pi2*values)*10
+
+    def _combine(self, coordinate_sums, pair_sums, vec):
+        return self.bias + coordinate_sums[0]
+
+
 
-class SchwefelDouble:
+class SchwefelDouble(BaseFunction):
     
     b = 65.536
 
-    def __init__(self, dim):
+    def __init__(self, dim, dtype = np.float64):
+
         check_dim(dim)
+        self.dtype = np.dtype(dtype)
 
-        self.x_best = np.zeros(dim)
+        self.x_best = np.zeros(dim, dtype = self.dtype)
         self.f_best = 0
 
         self.bounds = easy_bounds(SchwefelDouble.b)
 
 
     
-    def __call__(self, vec):
+    def _evaluate(self, vec):
 
-        cs = np.cumsum(vec)
+        cs = np.cumsum(vec, axis = -1)
 
-        s = sum((cs[i]**2 for i in range(vec.size)))
+        s = np.sum(cs*cs, axis = -1)
 
         return s
 
+    def _value_and_grad(self, vec):
+
+        cs = np.cumsum(vec, axis = -1)
+
+        # d/dx_j = 2 * sum of cs_k for k >= j
+        g = 2 * np.cumsum(cs[..., ::-1], axis = -1)[..., ::-1]
+
+        return np.sum(cs*cs, axis = -1), g
 
-class SchwefelMax:
+
+
+class SchwefelMax(BaseFunction):
     
     b = 100
 
-    def __init__(self, dim):
+    def __init__(self, dim, dtype = np.float64):
+
         check_dim(dim)
+        self.dtype = np.dtype(dtype)
 
-        self.x_best = np.zeros(dim)
+        self.x_best = np.zeros(dim, dtype = self.dtype)
         self.f_best = 0
 
         self.bounds = easy_bounds(SchwefelMax.b)
 
-    def __call__(self, vec):
+    def _evaluate(self, vec):
 
-        return np.abs(vec).max()
+        return np.abs(vec).max(axis = -1)
 
-class SchwefelAbs:
+class SchwefelAbs(BaseFunction):
     
     b = 10
 
-    def __init__(self, dim):
+    def __init__(self, dim, dtype = np.float64):
 
         check_dim(dim)
+        self.dtype = np.dtype(dtype)
 
-        self.x_best = np.zeros(dim)
+        self.x_best = np.zeros(dim, dtype = self.dtype)
         self.f_best = 0
 
         self.bounds = easy_bounds(SchwefelAbs.b)
 
-    def __call__(self, vec):
+    def _evaluate(self, vec):
 
         mod = np.abs(vec)
 
-        return np.sum(mod) + np.prod(mod)
+        return np.sum(mod, axis = -1) + np.prod(mod, axis = -1)
 
+    def _coordinate_terms(self, values, indices):
+        # product of moduli is kept as sum of logarithms and count of zero factors
+        mod = np.abs(values)
+        zero = mod == 0
+        return np.column_stack((mod, np.log(np.where(zero, 1, mod)), zero))
 
-class SchwefelSin:
+    def _combine(self, coordinate_sums, pair_sums, vec):
+        s, log_p, zero = coordinate_sums
+        return s + (0.0 if round(zero) > 0 else math.exp(log_p))
+
+
+
+class SchwefelSin(BaseFunction):
     
     b = 500
 
-    def __init__(self, dim):
+    def __init__(self, dim, dtype = np.float64):
 
         check_dim(dim, 1)
+        self.dtype = np.dtype(dtype)
 
-        self.x_best = np.full(dim, 420.9687)
+        self.x_best = np.full(dim, 420.9687, dtype = self.dtype)
         self.f_best = -12965.5
 
         self.bounds = easy_bounds(SchwefelSin.b)
 
-    def __call__(self, vec):
+    def _evaluate(self, vec):
+
+        return -np.sum(vec*np.sin(np.sqrt(np.abs(vec))), axis = -1)
+
+    def _value_and_grad(self, vec):
+
+        r = np.sqrt(np.abs(vec))
+        sin = np.sin(r)
+
+        return -np.sum(vec*sin, axis = -1), -(sin + r*np.cos(r)/2)
+
+    def _coordinate_terms(self, values, indices):
+        return -values*np.sin(np.sqrt(np.abs(values)))
 
-        return -sum((x*math.sin(math.sqrt(abs(x))) for x in vec))
 
 
-class Stairs:
+class Stairs(BaseFunction):
     
     b = 6
 
-    def __init__(self, dim):
+    def __init__(self, dim, dtype = np.float64):
 
         check_dim(dim)
+        self.dtype = np.dtype(dtype)
 
-        self.x_best = np.zeros(dim)
+        self.x_best = np.zeros(dim, dtype = self.dtype)
         self.f_best = 0
 
         self.bounds = easy_bounds(Stairs.b)
 
-    def __call__(self, vec):
+    def _evaluate(self, vec):
+
+        return np.sum(np.floor(vec + 0.5)**2, axis = -1)
+
+    def _coordinate_terms(self, values, indices):
+        return np.floor(values + 0.5)**2
 
-        return sum(( math.floor(x + 0.5)**2 for x in vec))
 
 
-class Abs:
+class Abs(BaseFunction):
     
     b = 10
 
-    def __init__(self, dim):
+    def __init__(self, dim, dtype = np.float64):
 
         check_dim(dim)
+        self.dtype = np.dtype(dtype)
 
-        self.x_best = np.zeros(dim)
+        self.x_best = np.zeros(dim, dtype = self.dtype)
         self.f_best = 0
 
         self.bounds = easy_bounds(Abs.b)
 
-    def __call__(self, vec):
+    def _evaluate(self, vec):
+
+        return np.sum(np.abs(vec), axis = -1)
 
-        return sum(( abs(x) for x in vec))
+    def _coordinate_terms(self, values, indices):
+        return np.abs(values)
 
 
-class Michalewicz:
+
+class Michalewicz(BaseFunction):
     
 
-    def __init__(self, m = 10):
+    def __init__(self, m = 10, dtype = np.float64):
+
+        self.dtype = np.dtype(dtype)
 
         self.x_best = None
         self.f_best = None
@@ -356,37 +943,82 @@ class Michalewicz:
 
         self.m = m*2
 
-    def __call__(self, vec):
+    def _evaluate(self, vec):
+
+        i = np.arange(1, vec.shape[-1] + 1, dtype = vec.dtype)
 
-        return -sum(( math.sin(x)*math.sin((i+1)*x**2/math.pi)**self.m for i, x in enumerate(vec)))
+        return -np.sum(np.sin(vec)*np.sin(i*vec*vec/math.pi)**self.m, axis = -1)
 
+    def _value_and_grad(self, vec):
 
-class Scheffer:
+        i = np.arange(1, vec.shape[-1] + 1, dtype = vec.dtype)
+        q = i*vec*vec/math.pi
+        sin_q = np.sin(q)
+        pw = sin_q**(self.m - 1)
+        sin_x = np.sin(vec)
+
+        s = -np.sum(sin_x*pw*sin_q, axis = -1)
+        g = -(np.cos(vec)*pw*sin_q + sin_x * self.m * pw * np.cos(q) * 2*i*vec/math.pi)
+
+        return s, g
+
+    def _coordinate_terms(self, values, indices):
+        return -np.sin(values)*np.sin((indices + 1)*values*values/math.pi)**self.m
+
+
+
+class Scheffer(BaseFunction):
     
     b = 7
 
-    def __init__(self, dim):
+    def __init__(self, dim, dtype = np.float64):
 
         check_dim(dim, 2)
+        self.dtype = np.dtype(dtype)
 
-        self.x_best = np.zeros(dim)
+        self.x_best = np.zeros(dim, dtype = self.dtype)
         self.f_best = 0
 
         self.bounds = easy_bounds(Scheffer.b)
 
 
-    def __call__(self, vec):
+    def _evaluate(self, vec):
+
+        x2, y2 = vec[..., :-1]**2, vec[..., 1:]**2
+
+        return 0.5 + np.sum((np.sin(x2 - y2)**2 - 0.5) / (1 + 0.001*(x2 + y2))**2, axis = -1)
 
-        return 0.5 + sum((  (math.sin( vec[i]**2 - vec[i+1]**2 )**2 - 0.5) / (1 + 0.001*(vec[i]**2 + vec[i+1]**2) )**2  for i in range(vec.size-1)))
+    def _value_and_grad(self, vec):
 
+        x, y = vec[..., :-1], vec[..., 1:]
+        x2, y2 = x*x, y*y
 
-class Eggholder:
+        num = np.sin(x2 - y2)**2 - 0.5
+        h = 1 + 0.001*(x2 + y2)
+        sin2 = np.sin(2*(x2 - y2))
+
+        s = 0.5 + np.sum(num / h**2, axis = -1)
+        g = pairs_grad(2*x*sin2 / h**2 - num*0.004*x / h**3, -2*y*sin2 / h**2 - num*0.004*y / h**3)
+
+        return s, g
+
+    def _pair_terms(self, x, y, indices):
+        x2, y2 = x*x, y*y
+        return (np.sin(x2 - y2)**2 - 0.5) / (1 + 0.001*(x2 + y2))**2
+
+    def _combine(self, coordinate_sums, pair_sums, vec):
+        return 0.5 + pair_sums[0]
+
+
+
+class Eggholder(BaseFunction):
     
     b = 512
 
-    def __init__(self, dim):
+    def __init__(self, dim, dtype = np.float64):
 
         check_dim(dim, 2)
+        self.dtype = np.dtype(dtype)
 
         self.x_best = None
         self.f_best = None
@@ -394,34 +1026,112 @@ class Eggholder:
         self.bounds = easy_bounds(Eggholder.b)
 
 
-    def __call__(self, vec):
+    def _evaluate(self, vec):
+
+        x, y = vec[..., :-1], vec[..., 1:]
+
+        return -np.sum((y + 47) * np.sin(np.sqrt(np.abs(y + x/2 + 47))) + x * np.sin(np.sqrt(np.abs(x - y - 47))), axis = -1)
+
+    def _value_and_grad(self, vec):
+
+        x, y = vec[..., :-1], vec[..., 1:]
+        u, v = y + x/2 + 47, x - y - 47
+        su, sv = np.sqrt(np.abs(u)), np.sqrt(np.abs(v))
+        sin_u, sin_v = np.sin(su), np.sin(sv)
+        du = (y + 47) * np.cos(su) * sqrt_abs_derivative(u)
+        dv = x * np.cos(sv) * sqrt_abs_derivative(v)
+
+        s = -np.sum((y + 47) * sin_u + x * sin_v, axis = -1)
+        g = -pairs_grad(du/2 + sin_v + dv, sin_u + du - dv)
+
+        return s, g
+
+    def _pair_terms(self, x, y, indices):
+        return -((y + 47) * np.sin(np.sqrt(np.abs(y + x/2 + 47))) + x * np.sin(np.sqrt(np.abs(x - y - 47))))
+
+
+
+@functools.lru_cache(maxsize = None)
+def weierstrass_tables(dim, a, b, kmax, dtype = np.dtype(np.float64)):
+    """
+    coefficients a**k, pi * b**k and bias of Weierstrass function shared by instances with the same parameters
+    """
+    ak = np.array([a**k for k in range(kmax+1)])
+    pibk = np.pi * np.array([b**k for k in range(kmax+1)])
+    bias = dtype.type(-dim*np.sum(ak*np.cos(pibk)))
 
-        return -sum(( (vec[i+1] + 47) * math.sin(math.sqrt(abs(vec[i+1] + vec[i]/2 + 47))) + vec[i] * math.sin(math.sqrt(abs(vec[i]-vec[i+1] - 47))) for i in range(vec.size-1)))
+    ak = ak.astype(dtype)
+    pibk = pibk.astype(dtype)
+    ak.flags.writeable = False
+    pibk.flags.writeable = False
 
+    return ak, pibk, bias
 
-class Weierstrass:
+
+
+class Weierstrass(BaseFunction):
     
     b = 0.5
 
-    def __init__(self, dim, a = 0.5, b = 3, kmax = 20):
+    # max count of elements of (points, dim, kmax+1) tensor computed at once
+    chunk_elements = 2**20
+
+    def __init__(self, dim, a = 0.5, b = 3, kmax = 20, dtype = np.float64):
 
         check_dim(dim, 1)
+        self.dtype = np.dtype(dtype)
 
-        self.x_best = np.zeros(dim)
+        self.x_best = np.zeros(dim, dtype = self.dtype)
         self.f_best = 0
 
         self.bounds = easy_bounds(Weierstrass.b)
 
-        self.ak = np.array([a**k for k in range(kmax+1)])
-        self.pibk = np.pi * np.array([b**k for k in range(kmax+1)])
+        self.ak, self.pibk, self.bias = weierstrass_tables(dim, a, b, kmax, self.dtype)
+        self.dpibk = -2 * self.ak * self.pibk
 
-        self.bias = -dim*np.sum(self.ak*np.cos(self.pibk))
+    def _chunked(self, vec, kernel):
+        """
+        applies kernel to chunks of population rows so that cos/sin tensor has at most chunk_elements elements
+        """
+        if vec.ndim < 2:
+            return kernel(vec)
 
+        rows = max(1, self.chunk_elements // (vec.shape[-1] * self.ak.size))
+        if vec.shape[0] <= rows:
+            return kernel(vec)
 
-    def __call__(self, vec):
-    
-        return self.bias + sum(( sum((ak * math.cos(x*pibk)  for ak, pibk in zip(self.ak, self.pibk) )) for x in vec*2 + 1 ))
+        results = [kernel(vec[start:start + rows]) for start in range(0, vec.shape[0], rows)]
+        if isinstance(results[0], tuple):
+            return tuple(np.concatenate(parts) for parts in zip(*results))
+        return np.concatenate(results)
+
+    def _values_kernel(self, vec):
+
+        # cos of tensor (..., dim, kmax+1) contracted with ak
+        terms = np.cos((vec*2 + 1)[..., np.newaxis] * self.pibk)
+
+        return self.bias + np.sum(terms @ self.ak, axis = -1)
+
+    def _value_and_grad_kernel(self, vec):
 
+        arg = (vec*2 + 1)[..., np.newaxis] * self.pibk
+
+        s = self.bias + np.sum(np.cos(arg) @ self.ak, axis = -1)
+        g = np.sin(arg) @ self.dpibk
+
+        return s, g
+
+    def _evaluate(self, vec):
+        return self._chunked(vec, self._values_kernel)
+
+    def _value_and_grad(self, vec):
+        return self._chunked(vec, self._value_and_grad_kernel)
+
+    def _coordinate_terms(self, values, indices):
+        return np.cos((values*2 + 1)[:, np.newaxis] * self.pibk) @ self.ak
+
+    def _combine(self, coordinate_sums, pair_sums, vec):
+        return self.bias + coordinate_sums[0]
 
 
 
@@ -458,6 +1168,12 @@ if __name__ == '__main__':
     for f in funcs:
         print(f(arr))
 
+    # population of points as 2D-array
+    population = np.array([arr, arr*2, arr*3])
+
+    for f in funcs:
+        print(f.evaluate_batch(population))
+
 
 
 
@@ -0,0 +1,104 @@
+
+import os
+
+import numpy as np
+
+from .parallel import process_pool
+from .registry import suite
+from .transformations import Transformation, Noises
+
+
+def default_functions(dim = 2):
+    """
+    returns dict name -> object of all test functions of package with default parameters
+    """
+    return suite(dim, seed = 1488)
+
+
+#
+# worker process state: rendered functions are passed once by initializer
+#
+
+_items = None
+_plot_kwargs = None
+
+
+def _init_worker(items, plot_kwargs):
+    global _items, _plot_kwargs
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    _items = items
+    _plot_kwargs = plot_kwargs
+
+
+def _render(index, resolution, path):
+
+    from .plot_func import plot_3d
+
+    name, func = _items[index]
+    plot_3d(func, points_by_dim = resolution, title = name.replace(' ', r'\ '), save_as = path, show = False, **_plot_kwargs)
+
+    return path
+
+
+def render_gallery(funcs, resolutions = (70,), out_dir = 'gallery', n_workers = None, mp_context = None, **plot_kwargs):
+    """
+    Renders plots of functions to files by parallel worker processes with non-interactive matplotlib backend
+
+    Parameters
+    ----------
+    funcs : dict/list
+        dict name -> function or Transformation object of 2 arguments (or list of such objects, names are their class names).
+    resolutions : iterable of int, optional
+        values of points_by_dim for each plot. The default is (70,).
+    out_dir : str, optional
+        directory for images (files are named '{name} {resolution}.png'). The default is 'gallery'.
+    n_workers : int/None, optional
+        count of worker processes. The default is None (count of CPU).
+    mp_context : str/None, optional
+        multiprocessing start method, functions should be picklable for 'spawn' and 'forkserver'. The default is None (platform default).
+    **plot_kwargs :
+        other arguments of plot_3d (cmap, bounds, plot_surface, plot_heatmap, show_best_if_exists).
+
+    Returns
+    -------
+    list of paths of created files.
+
+    """
+
+    if not isinstance(funcs, dict):
+        funcs = {type(f).__name__: f for f in funcs}
+    items = list(funcs.items())
+
+    os.makedirs(out_dir, exist_ok = True)
+
+    tasks = [
+        (index, resolution, os.path.join(out_dir, f"{name} {resolution}.png"))
+        for index, (name, _) in enumerate(items)
+        for resolution in resolutions
+    ]
+
+    with process_pool(n_workers, mp_context, _init_worker, (items, plot_kwargs)) as pool:
+        return pool.starmap(_render, tasks)
+
+
+def transformed(funcs, shift = None, rotation_seed = None, noise_sd = None):
+    """
+    wraps each function of dict name -> function by Transformation with 2D shift, random rotation and/or normal noise
+    """
+    if shift is None and rotation_seed is None and noise_sd is None:
+        return funcs
+
+    suffix = ' '.join(part for part, used in (('shifted', shift is not None), ('rotated', rotation_seed is not None), ('noised', noise_sd is not None)) if used)
+
+    return {
+        f"{name} {suffix}": Transformation(func,
+                                           shift_step = None if shift is None else np.array(shift, dtype = float),
+                                           rotation_matrix = None if rotation_seed is None else 2,
+                                           noise_generator = None if noise_sd is None else Noises.normal(0, noise_sd, seed = 0),
+                                           seed = rotation_seed)
+        for name, func in funcs.items()
+    }
+
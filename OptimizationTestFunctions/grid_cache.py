@@ -0,0 +1,225 @@
+
+import functools
+import hashlib
+import os
+import types
+
+import numpy as np
+
+from .evaluation import evaluate_grid, evaluate_grid_adaptive
+from .transformations import Transformation
+
+
+# changes of this version invalidate all existing cache files
+FORMAT_VERSION = 1
+
+# attributes which don't change values of function
+_IGNORED_ATTRIBUTES = {'backend'}
+
+
+def _describe(obj, hasher):
+    """
+    feeds stable description of obj into hasher
+    """
+    update = lambda text: hasher.update(text.encode() + b'\0')
+
+    if obj is None or isinstance(obj, (bool, int, float, complex, str, np.generic)):
+        update(f"{type(obj).__name__}:{obj!r}")
+
+    elif isinstance(obj, np.dtype):
+        update(f"dtype:{obj.str}")
+
+    elif isinstance(obj, np.ndarray):
+        update(f"array:{obj.dtype.str}:{obj.shape}")
+        hasher.update(np.ascontiguousarray(obj).tobytes())
+
+    elif isinstance(obj, (tuple, list)):
+        update(f"{type(obj).__name__}:{len(obj)}")
+        for item in obj:
+            _describe(item, hasher)
+
+    elif isinstance(obj, dict):
+        update(f"dict:{len(obj)}")
+        for key in sorted(obj):
+            update(str(key))
+            _describe(obj[key], hasher)
+
+    elif isinstance(obj, functools.partial):
+        update("partial")
+        _describe((obj.func, obj.args, obj.keywords), hasher)
+
+    elif isinstance(obj, Transformation):
+        # its lambdas are fully defined by these attributes
+        update("Transformation")
+        _describe(obj.transformed_function, hasher)
+        _describe(obj.rotation, hasher)
+        _describe(obj.bias, hasher)
+        _describe(obj.dtype, hasher)
+
+    elif isinstance(obj, (types.FunctionType, types.BuiltinFunctionType)):
+        # plain function: its name and code (values captured by closures are not seen, use explicit key for them)
+        update(f"function:{obj.__module__}.{obj.__qualname__}")
+        code = getattr(obj, '__code__', None)
+        if code is not None:
+            hasher.update(code.co_code)
+            _describe(tuple(c for c in code.co_consts if not isinstance(c, types.CodeType)), hasher)
+
+    elif hasattr(obj, '__dict__'):
+        cls = type(obj)
+        update(f"object:{cls.__module__}.{cls.__qualname__}")
+        _describe({name: value for name, value in vars(obj).items() if name not in _IGNORED_ATTRIBUTES}, hasher)
+
+    else:
+        raise TypeError(f"cannot make cache key from object of type {type(obj).__name__}")
+
+
+def fingerprint(func):
+    """
+    hex hash of function class and all its parameters (arrays of Fletcher, shift and rotation of Transformation, dtype...)
+    """
+    hasher = hashlib.sha1(f"v{FORMAT_VERSION}".encode())
+    _describe(func, hasher)
+    return hasher.hexdigest()
+
+
+class GridCache:
+
+    def __init__(self, directory = '.grid_cache', max_bytes = 2**30, mmap = True):
+        """
+        On-disk cache of grids computed by evaluate_grid (for example, for plot_3d)
+
+        Each grid is stored as '{function fingerprint}_{grid hash}.npy' file, so any change of
+        function parameters, bounds, resolution or dtype gives another file
+
+        Parameters
+        ----------
+        directory : str, optional
+            directory of cache files (created if not exists). The default is '.grid_cache'.
+        max_bytes : int/None, optional
+            max total size of cache files, least recently used files are removed after it. The default is 2**30.
+        mmap : boolean, optional
+            load cached grids as read-only memory-mapped arrays. The default is True.
+
+        """
+        assert (max_bytes is None or max_bytes > 0), f"max_bytes should be positive or None (got {max_bytes})"
+
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.mmap = mmap
+
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(directory, exist_ok = True)
+
+    def _prefix(self, func, key = None):
+        assert (not getattr(func, 'is_noised', False)), "grids of noised functions cannot be cached!"
+        return fingerprint(func) if key is None else hashlib.sha1(str(key).encode()).hexdigest()
+
+    def path(self, func, bounds, points_by_dim, key = None, adaptive_tolerance = None):
+        """
+        path of cache file for grid of func
+
+        key is optional explicit identity of func (for closures and other callables which parameters cannot be seen)
+        """
+        grid = (tuple(float(b) for b in bounds), int(points_by_dim))
+        if adaptive_tolerance is not None:
+            grid += ('adaptive', float(adaptive_tolerance))
+        grid = hashlib.sha1(repr(grid).encode()).hexdigest()[:16]
+        return os.path.join(self.directory, f"{self._prefix(func, key)}_{grid}.npy")
+
+    def _files(self):
+        return [entry for entry in os.scandir(self.directory) if entry.is_file() and entry.name.endswith('.npy')]
+
+    @property
+    def nbytes(self):
+        return sum(entry.stat().st_size for entry in self._files())
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'files': len(self._files()),
+            'nbytes': self.nbytes
+        }
+
+    def _load(self, path):
+        try:
+            data = np.load(path, mmap_mode = 'r' if self.mmap else None)
+        except (OSError, ValueError):
+            # missing or broken file
+            return None
+        os.utime(path) # mark as recently used
+        return data
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+
+        files = sorted(self._files(), key = lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in files)
+
+        # the newest file is kept even if it is bigger than max_bytes
+        for entry in files[:-1]:
+            if total <= self.max_bytes:
+                break
+            total -= entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def evaluate_grid(self, func, bounds = None, points_by_dim = 50, chunk_size = 2**16, key = None, adaptive_tolerance = None):
+        """
+        the same as evaluation.evaluate_grid (or evaluate_grid_adaptive if adaptive_tolerance is not None)
+        but loads grid from cache if it was computed earlier
+
+        Returns
+        -------
+        x, y, data (data is read-only memory-mapped array if mmap).
+
+        """
+        if bounds is None:
+            bounds = func.bounds
+
+        xmin, xmax, ymin, ymax = bounds
+        path = self.path(func, bounds, points_by_dim, key, adaptive_tolerance)
+
+        data = self._load(path) if os.path.exists(path) else None
+        if data is not None:
+            self.hits += 1
+            return np.linspace(xmin, xmax, points_by_dim), np.linspace(ymin, ymax, points_by_dim), data
+
+        self.misses += 1
+        if adaptive_tolerance is None:
+            x, y, data = evaluate_grid(func, bounds, points_by_dim, chunk_size)
+        else:
+            x, y, data = evaluate_grid_adaptive(func, bounds, points_by_dim, tolerance = adaptive_tolerance, chunk_size = chunk_size)
+
+        # write to temporary file first, so parallel readers never see incomplete file
+        tmp = f"{path[:-4]}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as file:
+            np.save(file, data)
+        os.replace(tmp, path)
+
+        self._evict()
+
+        return x, y, data
+
+    def invalidate(self, func, key = None):
+        """
+        removes all cached grids of func
+        """
+        prefix = self._prefix(func, key) + '_'
+        for entry in self._files():
+            if entry.name.startswith(prefix):
+                os.remove(entry.path)
+
+    def clear(self):
+        """
+        removes all cache files
+        """
+        for entry in self._files():
+            os.remove(entry.path)
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,255 @@
+#
+# Benchmarking of optimizers over suite of functions x dims x seeds in process pool
+#
+
+import time
+
+import numpy as np
+
+from .instrumentation import Instrumented, BudgetExhausted
+from .parallel import process_pool
+from .registry import REGISTRY, make
+from .rotations import DenseRotation, HouseholderRotation
+from .transformations import Transformation
+
+
+class ConvergenceLogger(Instrumented):
+
+    def __init__(self, func, budget, checkpoints):
+        """
+        Instrumented function which writes best-so-far value at evaluation counts of checkpoints
+        into preallocated array self.curve (NaN for not reached checkpoints)
+        """
+        self.checkpoints = np.asarray(checkpoints, dtype = np.int64)
+        self.curve = np.full(self.checkpoints.size, np.nan)
+        super().__init__(func, budget)
+
+    def _register(self, arr, values, elapsed):
+
+        done = self.evaluations
+        best = np.minimum.accumulate(np.asarray(values, dtype = float).ravel())
+        best = np.minimum(best, self.best_f)
+
+        # checkpoints c in (done, done + n] get best value after c evaluations
+        first, last = np.searchsorted(self.checkpoints, [done, done + best.size], side = 'right')
+        self.curve[first:last] = best[self.checkpoints[first:last] - done - 1]
+
+        super()._register(arr, values, elapsed)
+
+
+def shift_rotate(func, dim, seed):
+    """
+    default transformation of harness: random shift (up to 20% of bounds) and random rotation
+    (dense for dim <= 100, product of Householder reflections for larger dims)
+    """
+    rng = np.random.default_rng(seed)
+    xmin, xmax = func.bounds[:2]
+    shift = rng.uniform(-0.2, 0.2, dim) * (xmax - xmin) / 2
+
+    if dim <= 100:
+        q, r = np.linalg.qr(rng.standard_normal((dim, dim)))
+        rotation = DenseRotation(q * np.sign(np.diag(r)))
+    else:
+        rotation = HouseholderRotation(dim, k = 4, seed = seed)
+
+    return Transformation(func, shift_step = shift, rotation_matrix = rotation.astype(func.dtype))
+
+
+class BenchmarkResult:
+    """
+    convergence logs of all runs
+
+    Attributes
+    ----------
+    names, dims, seeds : lists of functions names, dims and seeds of runs.
+    checkpoints : 1D-array of evaluation counts where best values are logged.
+    curves : 4D-array (functions, dims, seeds, checkpoints) of best-so-far values (NaN after stop of optimizer).
+    f_best : 3D-array (functions, dims, seeds) of values at known optimum x_best (NaN if unknown).
+    evaluations : 3D-array of used evaluations.
+    times : 3D-array of seconds of runs.
+    """
+
+    def __init__(self, names, dims, seeds, checkpoints):
+        self.names = list(names)
+        self.dims = list(dims)
+        self.seeds = list(seeds)
+        self.checkpoints = checkpoints
+
+        shape = (len(self.names), len(self.dims), len(self.seeds))
+        self.curves = np.full(shape + (checkpoints.size,), np.nan)
+        self.f_best = np.full(shape, np.nan)
+        self.evaluations = np.zeros(shape, dtype = np.int64)
+        self.times = np.zeros(shape)
+
+    @property
+    def values(self):
+        """
+        best-so-far values for each checkpoint; after optimizer stopped the last value is kept
+        """
+        curves = self.curves.copy()
+        # forward fill of NaN after the last logged value
+        for i in range(1, curves.shape[-1]):
+            missing = np.isnan(curves[..., i])
+            curves[..., i][missing] = curves[..., i - 1][missing]
+        return curves
+
+    @property
+    def errors(self):
+        """
+        best-so-far errors to f_best (NaN for unknown optimum)
+        """
+        return self.values - self.f_best[..., np.newaxis]
+
+    def summary(self):
+        """
+        returns dict (name, dim) -> statistics of final errors (and values) by seeds
+        """
+        values = self.values[..., -1]
+        errors = values - self.f_best
+
+        result = {}
+        for i, name in enumerate(self.names):
+            for j, dim in enumerate(self.dims):
+                e = errors[i, j]
+                result[(name, dim)] = {
+                    'median_error': np.median(e) if not np.isnan(e).all() else None,
+                    'mean_error': np.mean(e) if not np.isnan(e).all() else None,
+                    'best_error': np.min(e) if not np.isnan(e).all() else None,
+                    'median_value': np.median(values[i, j]),
+                    'mean_evaluations': self.evaluations[i, j].mean(),
+                    'mean_time': self.times[i, j].mean()
+                }
+        return result
+
+    def ecdf(self, targets = np.logspace(2, -8, 51)):
+        """
+        ECDF of runtimes like in COCO: for each dim and checkpoint,
+        proportion of (function, seed, target) triples where error <= target is reached
+
+        functions with unknown optimum are skipped
+
+        Returns
+        -------
+        2D-array (dims, checkpoints).
+        """
+        targets = np.asarray(targets, dtype = float)
+        errors = self.errors[~np.isnan(self.f_best).any(axis = (1, 2))]
+
+        # (functions, dims, seeds, checkpoints, targets)
+        solved = errors[..., np.newaxis] <= targets
+        return solved.mean(axis = (0, 2, 4))
+
+    def save(self, path):
+        """
+        saves logs into .npz file
+        """
+        np.savez(path, names = np.array(self.names), dims = np.array(self.dims), seeds = np.array(self.seeds),
+                 checkpoints = self.checkpoints, curves = self.curves, f_best = self.f_best, evaluations = self.evaluations, times = self.times)
+
+    @staticmethod
+    def load(path):
+        data = np.load(path)
+        result = BenchmarkResult(data['names'].tolist(), data['dims'].tolist(), data['seeds'].tolist(), data['checkpoints'])
+        for name in ('curves', 'f_best', 'evaluations', 'times'):
+            setattr(result, name, data[name])
+        return result
+
+
+#
+# worker process state: optimizer and settings are passed once by initializer
+#
+
+_settings = None
+
+
+def _init_worker(settings):
+    global _settings
+    _settings = settings
+
+
+def _run(name, dim, seed):
+
+    optimizer, budget, checkpoints, transform, function_params = _settings
+
+    # each (function, dim, seed) is used once, so instances are not kept in cache of registry
+    func = make(name, dim, seed = seed, cached = False, **function_params.get(name, {}))
+    if transform is not None:
+        func = transform(func, dim, seed)
+
+    logger = ConvergenceLogger(func, budget, checkpoints)
+    start = time.perf_counter()
+    try:
+        optimizer(logger, dim, logger.bounds, budget, seed)
+    except BudgetExhausted:
+        pass
+    elapsed = time.perf_counter() - start
+
+    # class constants of f_best are not exact for each dim (SchwefelSin, Scheffer), so value at x_best is used
+    x_best = getattr(func, 'x_best', None)
+    f_best = np.nan if x_best is None else float(func(x_best))
+    return logger.curve, f_best, logger.evaluations, elapsed
+
+
+def run_benchmark(optimizer, budget, names = None, dims = (2, 10), seeds = range(5), transform = None, log_points = 100,
+                  n_workers = None, mp_context = None, function_params = None):
+    """
+    Runs optimizer on each function x dim x seed in process pool and logs convergence
+
+    Parameters
+    ----------
+    optimizer : function
+        function (func, dim, bounds, budget, seed) -> anything which minimizes func (func accepts points and populations,
+        BudgetExhausted raised after budget is caught by harness).
+    budget : int
+        max count of evaluations for each run.
+    names : list/None, optional
+        names of registered functions. The default is None (all functions available for min of dims).
+    dims : iterable of int, optional
+        dimensions. The default is (2, 10).
+    seeds : iterable of int, optional
+        seeds of runs (for Fletcher matrices, transformation and optimizer). The default is range(5).
+    transform : function/None, optional
+        function (func, dim, seed) -> wrapped function, for example shift_rotate. The default is None.
+    log_points : int, optional
+        count of log-spaced checkpoints of convergence curves. The default is 100.
+    n_workers : int/None, optional
+        count of worker processes, 1 means serial run in this process. The default is None (count of CPU).
+    mp_context : str/None, optional
+        multiprocessing start method, optimizer and transform should be module-level functions for 'spawn' and 'forkserver'.
+        The default is None (platform default).
+    function_params : dict/None, optional
+        dict name -> dict of constructor parameters. The default is None.
+
+    Returns
+    -------
+    BenchmarkResult object.
+
+    """
+    assert (budget >= 1), f"budget should be positive (got {budget})"
+
+    dims = list(dims)
+    seeds = list(seeds)
+    if names is None:
+        names = [name for name, info in REGISTRY.items() if info.min_dim <= min(dims)]
+
+    checkpoints = np.unique(np.geomspace(1, budget, log_points).round().astype(np.int64))
+    result = BenchmarkResult(names, dims, seeds, checkpoints)
+
+    tasks = [(name, dim, seed) for name in names for dim in dims for seed in seeds]
+    settings = (optimizer, budget, checkpoints, transform, {} if function_params is None else function_params)
+
+    if n_workers == 1:
+        _init_worker(settings)
+        outputs = [_run(*task) for task in tasks]
+    else:
+        with process_pool(n_workers, mp_context, _init_worker, (settings,)) as pool:
+            outputs = pool.starmap(_run, tasks)
+
+    for (name, dim, seed), (curve, f_best, evaluations, elapsed) in zip(tasks, outputs):
+        index = names.index(name), dims.index(dim), seeds.index(seed)
+        result.curves[index] = curve
+        result.f_best[index] = f_best
+        result.evaluations[index] = evaluations
+        result.times[index] = elapsed
+
+    return result
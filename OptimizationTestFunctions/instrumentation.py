@@ -0,0 +1,179 @@
+
+import time
+import numpy as np
+
+from .evaluation import copy_metadata, evaluate_population
+from .transformations import Transformation
+
+
+class BudgetExhausted(Exception):
+    """
+    stop signal raised by Instrumented object when evaluation budget is over
+
+    `values` contains values of points evaluated by the last call before the budget ended (or None)
+    """
+    def __init__(self, budget, values = None):
+        super().__init__(f"evaluation budget ({budget}) is exhausted")
+        self.budget = budget
+        self.values = values
+
+
+class Instrumented:
+
+    def __init__(self, func, budget = None, profile_stages = False, stage_hook = None, latency_bins = None):
+        """
+        Wraps function or Transformation object to count evaluations, control budget and measure time
+
+        Parameters
+        ----------
+        func : function or class callable object
+            evaluated function.
+        budget : int/None, optional
+            max count of evaluated points, BudgetExhausted is raised after it. The default is None (no limit).
+        profile_stages : boolean, optional
+            measure time of shift, rotate, function and noise stages separately. The default is False.
+        stage_hook : function/None, optional
+            function (stage name, seconds, n_points) -> None called after each stage if profile_stages. The default is None.
+        latency_bins : 1D-array/None, optional
+            increasing bounds (in seconds) of latency histogram bins. The default is None (log-spaced bins from 1e-8 to 10 seconds).
+
+        """
+        assert (budget is None or budget >= 0), f"budget should be non-negative or None (got {budget})"
+
+        self.func = func
+        self.budget = budget
+        self.profile_stages = profile_stages
+        self.stage_hook = stage_hook
+        self.latency_bins = np.logspace(-8, 1, 37) if latency_bins is None else np.asarray(latency_bins, dtype = float)
+
+        copy_metadata(self, func)
+
+        self.reset()
+
+    def reset(self):
+        """
+        clears all counters
+        """
+        self.single_calls = 0
+        self.batch_calls = 0
+        self.evaluations = 0
+        self.total_time = 0.0
+
+        # latency_counts[i] is count of evaluations with time per point in [latency_bins[i-1], latency_bins[i])
+        self.latency_counts = np.zeros(self.latency_bins.size + 1, dtype = np.int64)
+        self.stage_times = {}
+
+        self.best_f = np.inf
+        self.best_x = None
+
+    @property
+    def remaining(self):
+        return None if self.budget is None else self.budget - self.evaluations
+
+    def __call__(self, vec):
+        vec = np.asarray(vec)
+        if vec.ndim == 2:
+            return self.evaluate_batch(vec)
+
+        if self.remaining is not None and self.remaining < 1:
+            raise BudgetExhausted(self.budget)
+
+        start = time.perf_counter()
+        value = self._evaluate_staged(vec, single = True) if self.profile_stages else self.func(vec)
+        elapsed = time.perf_counter() - start
+
+        self.single_calls += 1
+        self._register(vec[np.newaxis], np.array([value], dtype = float), elapsed)
+
+        return value
+
+    def evaluate_batch(self, arr):
+        arr = np.asarray(arr)
+        assert (arr.ndim == 2), f"population should be 2D-array with shape (n_points, dim) (got shape {arr.shape})"
+
+        remaining = self.remaining
+        exhausted = remaining is not None and arr.shape[0] > remaining
+        if exhausted:
+            if remaining < 1:
+                raise BudgetExhausted(self.budget)
+            arr = arr[:remaining]
+
+        start = time.perf_counter()
+        values = self._evaluate_staged(arr) if self.profile_stages else evaluate_population(self.func, arr)
+        elapsed = time.perf_counter() - start
+
+        self.batch_calls += 1
+        self._register(arr, values, elapsed)
+
+        if exhausted:
+            raise BudgetExhausted(self.budget, values)
+
+        return values
+
+    def _register(self, arr, values, elapsed):
+
+        n = values.size
+
+        self.evaluations += n
+        self.total_time += elapsed
+        if n == 0:
+            # empty population: nothing for histogram and best-so-far
+            return
+
+        self.latency_counts[np.searchsorted(self.latency_bins, elapsed / n, side = 'right')] += n
+
+        i = np.argmin(values)
+        if values[i] < self.best_f:
+            self.best_f = values[i]
+            self.best_x = arr[i].copy()
+
+    def _stage(self, name, action, n_points):
+
+        start = time.perf_counter()
+        result = action()
+        elapsed = time.perf_counter() - start
+
+        self.stage_times[name] = self.stage_times.get(name, 0.0) + elapsed
+        if self.stage_hook is not None:
+            self.stage_hook(name, elapsed, n_points)
+
+        return result
+
+    def _evaluate_staged(self, arr, single = False):
+
+        func = self.func
+        n = 1 if single else arr.shape[0]
+
+        if not isinstance(func, Transformation):
+            return self._stage('function', lambda: func(arr) if single else evaluate_population(func, arr), n)
+
+        # the same affine map as Transformation.affine: rotation first, then shift in rotated coordinates
+        if func.rotation is not None:
+            arr = self._stage('rotate', lambda: func.rotation.apply(arr), n)
+        if func.bias is not None:
+            arr = self._stage('shift', lambda: arr + func.bias, n)
+
+        base = func.transformed_function
+        values = self._stage('function', lambda: base(arr) if single else evaluate_population(base, arr), n)
+
+        if func.noiser is None:
+            return values
+        return self._stage('noise', lambda: func.noiser(values) if single else func.add_noise(values), n)
+
+    def summary(self):
+        """
+        returns dict with counters, timings and best found solution
+        """
+        return {
+            'single_calls': self.single_calls,
+            'batch_calls': self.batch_calls,
+            'evaluations': self.evaluations,
+            'total_time': self.total_time,
+            'evals_per_sec': self.evaluations / self.total_time if self.total_time > 0 else None,
+            'best_f': self.best_f,
+            'best_x': self.best_x,
+            'stage_times': dict(self.stage_times),
+            'latency_bins': self.latency_bins,
+            'latency_counts': self.latency_counts.copy()
+        }
+
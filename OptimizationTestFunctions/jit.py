@@ -0,0 +1,308 @@
+#
+# Optional numba backend: fused single-pass kernels over rows of population
+#
+# Kernels take C-contiguous float64 2D-array (n_points, dim) and parameters of function object
+# and return 1D-array of n_points values. Rows are processed by parallel loop.
+#
+
+import math
+import warnings
+
+import numpy as np
+
+try:
+    import numba
+    HAS_NUMBA = True
+    prange = numba.prange
+except ImportError:
+    numba = None
+    HAS_NUMBA = False
+    prange = range
+
+
+def _sphere(arr, deg):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s = 0.0
+        for j in range(dim):
+            s += arr[r, j]**deg
+        out[r] = s
+    return out
+
+
+def _ackley(arr, bias, pi2):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s1 = 0.0
+        s2 = 0.0
+        for j in range(dim):
+            x = arr[r, j]
+            s1 += x*x
+            s2 += math.cos(pi2*x)
+        out[r] = bias - 20*math.exp(-0.2*math.sqrt(s1/dim)) - math.exp(s2/dim)
+    return out
+
+
+def _ackley_test(arr, e):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s = 0.0
+        for j in range(dim - 1):
+            x, y = arr[r, j], arr[r, j+1]
+            s += 3*(math.cos(2*x) + math.sin(2*y)) + e * math.sqrt(x*x + y*y)
+        out[r] = s
+    return out
+
+
+def _rosenbrock(arr):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s = 0.0
+        for j in range(dim - 1):
+            x, y = arr[r, j], arr[r, j+1]
+            s += 100 * (y - x*x)**2 + (x - 1)**2
+        out[r] = s
+    return out
+
+
+def _fletcher(arr, A, sum_a, sum_b):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s = 0.0
+        for j in range(dim):
+            d = A[j] - (math.sin(arr[r, j]) * sum_a[j] + math.cos(arr[r, j]) * sum_b[j])
+            s += d*d
+        out[r] = s
+    return out
+
+
+def _griewank(arr):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s = 0.0
+        p = 1.0
+        for j in range(dim):
+            x = arr[r, j]
+            s += x*x
+            p *= math.cos(x/math.sqrt(j + 1))
+        out[r] = 1 + s/4000 - p
+    return out
+
+
+def _penalty2(arr, a, k, m, pi2, pi3):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        u = 0.0
+        s2 = 0.0
+        for j in range(dim):
+            x = arr[r, j]
+            if x > a:
+                u += (x - a)**m
+            elif x < -a:
+                u += (-x - a)**m
+            if j < dim - 1:
+                y = arr[r, j+1]
+                s2 += (x - 1)**2 * (1 + math.sin(pi3 * y*y))
+        first, last = arr[r, 0], arr[r, dim-1]
+        s1 = 10 * math.sin(pi3*first)**2 + (last - 1)**2 * (1 + math.sin(pi2 * last*last))
+        out[r] = k*u + 0.1 * (s1 + s2)
+    return out
+
+
+def _quartic(arr):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s = 0.0
+        for j in range(dim):
+            x2 = arr[r, j]**2
+            s += (j + 1) * x2 * x2
+        out[r] = s
+    return out
+
+
+def _rastrigin(arr, bias, pi2):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s = 0.0
+        for j in range(dim):
+            x = arr[r, j]
+            s += x*x - math.cos(pi2*x)*10
+        out[r] = bias + s
+    return out
+
+
+def _schwefel_double(arr):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s = 0.0
+        cs = 0.0
+        for j in range(dim):
+            cs += arr[r, j]
+            s += cs*cs
+        out[r] = s
+    return out
+
+
+def _schwefel_max(arr):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s = 0.0
+        for j in range(dim):
+            s = max(s, abs(arr[r, j]))
+        out[r] = s
+    return out
+
+
+def _schwefel_abs(arr):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s = 0.0
+        p = 1.0
+        for j in range(dim):
+            x = abs(arr[r, j])
+            s += x
+            p *= x
+        out[r] = s + p
+    return out
+
+
+def _schwefel_sin(arr):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s = 0.0
+        for j in range(dim):
+            x = arr[r, j]
+            s += x*math.sin(math.sqrt(abs(x)))
+        out[r] = -s
+    return out
+
+
+def _stairs(arr):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s = 0.0
+        for j in range(dim):
+            s += math.floor(arr[r, j] + 0.5)**2
+        out[r] = s
+    return out
+
+
+def _abs(arr):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s = 0.0
+        for j in range(dim):
+            s += abs(arr[r, j])
+        out[r] = s
+    return out
+
+
+def _michalewicz(arr, m):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s = 0.0
+        for j in range(dim):
+            x = arr[r, j]
+            s += math.sin(x)*math.sin((j + 1)*x*x/math.pi)**m
+        out[r] = -s
+    return out
+
+
+def _scheffer(arr):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s = 0.0
+        for j in range(dim - 1):
+            x2, y2 = arr[r, j]**2, arr[r, j+1]**2
+            s += (math.sin(x2 - y2)**2 - 0.5) / (1 + 0.001*(x2 + y2))**2
+        out[r] = 0.5 + s
+    return out
+
+
+def _eggholder(arr):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s = 0.0
+        for j in range(dim - 1):
+            x, y = arr[r, j], arr[r, j+1]
+            s += (y + 47) * math.sin(math.sqrt(abs(y + x/2 + 47))) + x * math.sin(math.sqrt(abs(x - y - 47)))
+        out[r] = -s
+    return out
+
+
+def _weierstrass(arr, ak, pibk, bias):
+    n, dim = arr.shape
+    out = np.empty(n)
+    for r in prange(n):
+        s = 0.0
+        for j in range(dim):
+            x = arr[r, j]*2 + 1
+            for k in range(ak.size):
+                s += ak[k] * math.cos(x*pibk[k])
+        out[r] = bias + s
+    return out
+
+
+# class name -> (kernel, function object -> tuple of kernel parameters or None if kernel is not applicable)
+KERNELS = {
+    'Sphere': (_sphere, lambda f: (float(f.deg),)),
+    'Ackley': (_ackley, lambda f: (f.bias, f.pi2)),
+    'AckleyTest': (_ackley_test, lambda f: (f.exp,)),
+    'Rosenbrock': (_rosenbrock, lambda f: ()),
+    'Fletcher': (_fletcher, lambda f: (f.A, f.sum_a, f.sum_b) if f.mode == 'sum' else None),
+    'Griewank': (_griewank, lambda f: ()),
+    'Penalty2': (_penalty2, lambda f: (float(f.a), float(f.k), float(f.m), f.pi2, f.pi3)),
+    'Quartic': (_quartic, lambda f: ()),
+    'Rastrigin': (_rastrigin, lambda f: (float(f.bias), f.pi2)),
+    'SchwefelDouble': (_schwefel_double, lambda f: ()),
+    'SchwefelMax': (_schwefel_max, lambda f: ()),
+    'SchwefelAbs': (_schwefel_abs, lambda f: ()),
+    'SchwefelSin': (_schwefel_sin, lambda f: ()),
+    'Stairs': (_stairs, lambda f: ()),
+    'Abs': (_abs, lambda f: ()),
+    'Michalewicz': (_michalewicz, lambda f: (float(f.m),)),
+    'Scheffer': (_scheffer, lambda f: ()),
+    'Eggholder': (_eggholder, lambda f: ()),
+    'Weierstrass': (_weierstrass, lambda f: (f.ak, f.pibk, float(f.bias)))
+}
+
+_compiled = {}
+
+
+def get_kernel(name):
+    """
+    returns compiled kernel and parameters getter for function class name or None if it is unavailable
+    """
+    if not HAS_NUMBA:
+        if not _compiled.get('warned', False):
+            warnings.warn("numba is not installed, numpy backend is used")
+            _compiled['warned'] = True
+        return None
+
+    if name not in KERNELS:
+        return None
+
+    if name not in _compiled:
+        kernel, params = KERNELS[name]
+        _compiled[name] = (numba.njit(parallel = True, cache = True)(kernel), params)
+
+    return _compiled[name]
+
@@ -0,0 +1,200 @@
+
+import math
+import multiprocessing
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .evaluation import evaluate_population
+from .transformations import Transformation
+from .shared import SharedTables, _attach
+
+
+#
+# process workers state (one function and attached shared buffers per worker process)
+#
+
+_worker_func = None
+_worker_noiseless = False
+_worker_buffers = {}
+
+
+def _init_worker(func, noiseless):
+    global _worker_func, _worker_noiseless
+    _worker_func = func
+    _worker_noiseless = noiseless
+
+
+def _worker_arrays(in_name, out_name, shape, dtype):
+
+    # forget buffers of previous (smaller) populations
+    for name in list(_worker_buffers):
+        if name not in (in_name, out_name):
+            _worker_buffers.pop(name).close()
+
+    for name in (in_name, out_name):
+        if name not in _worker_buffers:
+            _worker_buffers[name] = _attach(name)
+
+    arr = np.ndarray(shape, dtype = dtype, buffer = _worker_buffers[in_name].buf)
+    out = np.ndarray(shape[:1], dtype = dtype, buffer = _worker_buffers[out_name].buf)
+    return arr, out
+
+
+def _evaluate_chunk(func, arr, noiseless):
+    if noiseless:
+        return func.evaluate_batch(arr, noised = False)
+    return evaluate_population(func, arr)
+
+
+def _process_task(in_name, out_name, shape, dtype, start, stop):
+    arr, out = _worker_arrays(in_name, out_name, shape, dtype)
+    out[start:stop] = _evaluate_chunk(_worker_func, arr[start:stop], _worker_noiseless)
+
+
+def _release(pool, buffers):
+    if pool is not None:
+        pool.shutdown(wait = True) if isinstance(pool, ThreadPoolExecutor) else pool.terminate()
+    for shm in buffers:
+        shm.close()
+        shm.unlink()
+
+
+def process_pool(n_workers = None, mp_context = None, initializer = None, initargs = ()):
+    """
+    multiprocessing pool of n_workers (count of CPU by default) processes started by mp_context method
+
+    None means the platform default start method ('spawn' on Windows and macOS),
+    with 'spawn' and 'forkserver' initargs and tasks should be picklable
+    """
+    ctx = multiprocessing.get_context(mp_context)
+    return ctx.Pool(n_workers or multiprocessing.cpu_count(), initializer = initializer, initargs = initargs)
+
+
+class ParallelEvaluator:
+
+    def __init__(self, func, n_workers = None, backend = 'process', chunk_size = None, mp_context = None, shared_tables = None):
+        """
+        Evaluates populations of function or Transformation object by pool of warm workers
+
+        Parameters
+        ----------
+        func : function or class callable object
+            evaluated function.
+        n_workers : int/None, optional
+            count of workers. The default is None (count of CPU).
+        backend : str, optional
+            'process' for process pool with shared memory inputs/outputs
+            or 'thread' for thread pool (useful for numpy-heavy batched paths which release the GIL). The default is 'process'.
+        chunk_size : int/None, optional
+            count of points evaluated by one task. The default is None (population is split equally between workers).
+        mp_context : str/None, optional
+            multiprocessing start method (see process_pool). The default is None.
+        shared_tables : str/None, optional
+            'shm' or 'mmap' to move large tables of func into SharedTables before starting of workers,
+            so 'spawn' and 'forkserver' workers attach them without copies; tables are released by close(). The default is None.
+
+        Noise of Transformation objects is added in main process after parallel evaluation,
+        so results equal to serial evaluation with the same seed of noise generator.
+        """
+        assert (backend in ('process', 'thread')), f"backend should be 'process' or 'thread' (got {backend})"
+
+        self.func = func
+        self.backend = backend
+        self.n_workers = n_workers or multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        # populations and values are passed in dtype of function without casts
+        self.dtype = np.dtype(getattr(func, 'dtype', np.float64))
+
+        self.noiseless = isinstance(func, Transformation) and func.noiser is not None
+
+        self.tables = None
+        if shared_tables is not None and backend == 'process':
+            self.tables = SharedTables(shared_tables)
+            self.tables.share(func)
+
+        if backend == 'thread':
+            self.pool = ThreadPoolExecutor(max_workers = self.n_workers)
+        else:
+            self.pool = process_pool(self.n_workers, mp_context, _init_worker, (func, self.noiseless))
+
+        # shared buffers are reused while populations fit them
+        self.buffers = []
+        self.capacity = (0, 0)
+        self._finalizer = weakref.finalize(self, _release, self.pool, self.buffers)
+
+    def _bounds(self, n):
+        chunk = self.chunk_size or math.ceil(n / self.n_workers)
+        return [(start, min(start + chunk, n)) for start in range(0, n, chunk)]
+
+    def _shared_arrays(self, shape):
+
+        n, dim = shape
+        if n > self.capacity[0] or dim != self.capacity[1]:
+            for shm in self.buffers:
+                shm.close()
+                shm.unlink()
+            self.buffers[:] = [
+                shared_memory.SharedMemory(create = True, size = max(8, n * dim * self.dtype.itemsize)),
+                shared_memory.SharedMemory(create = True, size = max(8, n * self.dtype.itemsize))
+            ]
+            self.capacity = (n, dim)
+
+        shm_in, shm_out = self.buffers
+        arr = np.ndarray(shape, dtype = self.dtype, buffer = shm_in.buf)
+        out = np.ndarray((n,), dtype = self.dtype, buffer = shm_out.buf)
+        return shm_in.name, shm_out.name, arr, out
+
+    def __call__(self, arr):
+        return self.evaluate_batch(arr)
+
+    def evaluate_batch(self, arr):
+        """
+        evaluates each row of 2D-array (n_points, dim), returns 1D-array of values in the same order
+        """
+        arr = np.asarray(arr, dtype = self.dtype)
+        assert (arr.ndim == 2), f"population should be 2D-array with shape (n_points, dim) (got shape {arr.shape})"
+        assert self._finalizer.alive, "evaluator is closed!"
+
+        if arr.shape[0] == 0:
+            return np.empty(0, dtype = self.dtype)
+
+        bounds = self._bounds(arr.shape[0])
+
+        if self.backend == 'thread':
+            values = np.empty(arr.shape[0], dtype = self.dtype)
+
+            def task(start, stop):
+                values[start:stop] = _evaluate_chunk(self.func, arr[start:stop], self.noiseless)
+
+            for future in [self.pool.submit(task, start, stop) for start, stop in bounds]:
+                future.result()
+        else:
+            in_name, out_name, shared_arr, out = self._shared_arrays(arr.shape)
+            shared_arr[:] = arr
+
+            self.pool.starmap(_process_task, [(in_name, out_name, arr.shape, self.dtype, start, stop) for start, stop in bounds])
+
+            values = out.copy()
+
+        if self.noiseless:
+            values = self.func.add_noise(values)
+
+        return values
+
+    def close(self):
+        """
+        stops workers and releases shared memory
+        """
+        self._finalizer()
+        if self.tables is not None:
+            self.tables.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
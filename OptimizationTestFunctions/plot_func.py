@@ -8,6 +8,8 @@ from matplotlib import cm
 
 from OppOpPopInit import OppositionOperators
 
+from .evaluation import evaluate_grid, evaluate_grid_adaptive, evaluate_slices
+
 
 def get_good_arrow_place(optimum, bounds):
     opt = np.array(optimum)
@@ -21,7 +23,7 @@ def get_good_arrow_place(optimum, bounds):
 
 
 
-def plot_3d(func, points_by_dim = 50, title = '', bounds = None, show_best_if_exists = True, save_as = None, cmap = 'twilight', plot_surface = True, plot_heatmap = True):
+def plot_3d(func, points_by_dim = 50, title = '', bounds = None, show_best_if_exists = True, save_as = None, cmap = 'twilight', plot_surface = True, plot_heatmap = True, show = True, grid_cache = None, adaptive_tolerance = None):
     """
     Plots function surface and/or heatmap
 
@@ -45,6 +47,12 @@ def plot_3d(func, points_by_dim = 50, title = '', bounds = None, show_best_if_ex
         plot 3D surface. The default is True.
     plot_heatmap : boolean, optional
         plot 2D heatmap. The default is True.
+    show : boolean, optional
+        show plot window (disable it for headless rendering to files). The default is True.
+    grid_cache : GridCache/None, optional
+        on-disk cache of computed grids, so replotting with another cmap or title doesn't evaluate function again. The default is None.
+    adaptive_tolerance : float/None, optional
+        sample grid adaptively (evaluate_grid_adaptive) with this relative tolerance instead of evaluating all points. The default is None.
     """
     
     assert (plot_surface or plot_heatmap), "should be plotted at least surface or heatmap!"
@@ -54,19 +62,14 @@ def plot_3d(func, points_by_dim = 50, title = '', bounds = None, show_best_if_ex
     
     xmin, xmax, ymin, ymax = bounds
 
-    x = np.linspace(xmin, xmax, points_by_dim)
-    y = np.linspace(ymin, ymax, points_by_dim)
-
+    if grid_cache is not None:
+        x, y, data = grid_cache.evaluate_grid(func, bounds, points_by_dim, adaptive_tolerance = adaptive_tolerance)
+    elif adaptive_tolerance is not None:
+        x, y, data = evaluate_grid_adaptive(func, bounds, points_by_dim, tolerance = adaptive_tolerance)
+    else:
+        x, y, data = evaluate_grid(func, bounds, points_by_dim)
 
-    a, b = np.meshgrid(x, y)
-    
-    data = np.empty((points_by_dim, points_by_dim))
-    for i in range(points_by_dim):
-        for j in range(points_by_dim):
-            data[i,j] = func(np.array([x[i], y[j]]))
-    
-    a = a.T
-    b = b.T
+    a, b = np.meshgrid(x, y, indexing = 'ij')
 
     l_a, r_a, l_b, r_b = xmin, xmax, ymin, ymax
     
@@ -84,7 +87,7 @@ def plot_3d(func, points_by_dim = 50, title = '', bounds = None, show_best_if_ex
         if plot_heatmap:
             ax1 = fig.gca()
         else:
-            ax2 = fig.gca(projection='3d')
+            ax2 = fig.add_subplot(1,1,1, projection='3d')
 
     title = r"$\bf{" + title+ r"}$"
     min_title = title[::]
@@ -143,11 +146,73 @@ def plot_3d(func, points_by_dim = 50, title = '', bounds = None, show_best_if_ex
     if save_as != None:
         plt.savefig(save_as, dpi = 250)
     
-    plt.show()
+    if show:
+        plt.show()
 
-    plt.close()
+    plt.close(fig)
 
 
+def plot_slices(func, slices = ((0, 1),), base = None, bounds = None, points_by_dim = 50, title = '', save_as = None, cmap = 'twilight', ncols = 3, show = True):
+    """
+    Plots heatmaps of 2D slices of function of any dimension through base point (see evaluate_slices)
 
+    Parameters
+    ----------
+    func : class callable object
+        Object which can be called as function of any dimension.
+    slices : list, optional
+        each slice is pair of axes indexes (i, j) or pair of direction vectors (u, v). The default is ((0, 1),).
+    base : numpy 1D-array/None, optional
+        fixed point of slices. The default is None (func.x_best).
+    bounds : tuple/None, optional
+        bounds of slice coordinates (xmin, xmax, ymin, ymax). The default is None.
+    points_by_dim : int, optional
+        points for each dimension of slice. The default is 50.
+    title : str, optional
+        title of figure. The default is ''.
+    save_as : str/None, optional
+        file path to save image (None if not needed). The default is None.
+    cmap : str, optional
+        color map of plot. The default is 'twilight'.
+    ncols : int, optional
+        max count of slices in one row of figure. The default is 3.
+    show : boolean, optional
+        show plot window. The default is True.
+    """
+
+    x, y, data = evaluate_slices(func, slices, base, bounds, points_by_dim)
+
+    count = len(slices)
+    ncols = min(ncols, count)
+    nrows = -(-count // ncols)
+
+    fig, axes = plt.subplots(nrows, ncols, figsize = (5.5 * ncols, 4.5 * nrows), squeeze = False)
+
+    for k, spec in enumerate(slices):
+        ax = axes[k // ncols, k % ncols]
+        a, b = np.meshgrid(x[k], y[k], indexing = 'ij')
+        c = ax.contourf(a, b, data[k], cmap = cmap, levels = MaxNLocator(nbins = 15).tick_values(data[k].min(), data[k].max()))
+        fig.colorbar(c, ax = ax)
+
+        if np.ndim(spec[0]) == 0:
+            ax.set_xlabel(f'x[{spec[0]}]')
+            ax.set_ylabel(f'x[{spec[1]}]')
+        else:
+            ax.set_xlabel(f'direction {k} u')
+            ax.set_ylabel(f'direction {k} v')
+
+    for k in range(count, nrows * ncols):
+        axes[k // ncols, k % ncols].axis('off')
+
+    if title:
+        fig.suptitle(r"$\bf{" + title + r"}$", fontsize = 15)
+
+    fig.tight_layout()
+
+    if save_as != None:
+        plt.savefig(save_as, dpi = 250)
 
+    if show:
+        plt.show()
 
+    plt.close(fig)
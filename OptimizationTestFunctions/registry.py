@@ -0,0 +1,168 @@
+#
+# Registry of test functions with metadata and factory of suites with cached instances
+#
+
+import numpy as np
+
+from . import functions
+
+
+class FunctionInfo:
+    """
+    metadata of test function class
+
+    Attributes
+    ----------
+    name : str
+        name of function (class name).
+    cls : class
+        class of function.
+    min_dim : int
+        minimal dimension.
+    takes_dim : boolean
+        whether constructor gets dim (Michalewicz works with any dim without it).
+    bound : float/tuple
+        default bounds: b for (-b, b) by each dim or tuple (low, high).
+    known_optimum : boolean
+        whether x_best and f_best are known.
+    separable : boolean
+        whether function is sum of terms of single coordinates.
+    modality : str
+        'unimodal' or 'multimodal'.
+    cost : str
+        cost of one evaluation: 'cheap' (O(dim)), 'moderate' (O(dim * k) with large k) or 'expensive' (O(dim^2)).
+    random : boolean
+        whether instance depends on random seed.
+    """
+
+    def __init__(self, cls, min_dim, bound, known_optimum, separable, modality, cost, takes_dim = True, random = False):
+        assert (modality in ('unimodal', 'multimodal')), f"unknown modality {modality}"
+        assert (cost in ('cheap', 'moderate', 'expensive')), f"unknown cost class {cost}"
+
+        self.name = cls.__name__
+        self.cls = cls
+        self.min_dim = min_dim
+        self.takes_dim = takes_dim
+        self.bound = bound
+        self.known_optimum = known_optimum
+        self.separable = separable
+        self.modality = modality
+        self.cost = cost
+        self.random = random
+
+    def __repr__(self):
+        return f"FunctionInfo({self.name}, min_dim = {self.min_dim}, {'separable' if self.separable else 'non-separable'}, {self.modality}, {self.cost})"
+
+
+REGISTRY = {}
+
+
+def register(cls, min_dim = 1, bound = None, known_optimum = True, separable = False, modality = 'multimodal', cost = 'cheap', takes_dim = True, random = False):
+    """
+    adds function class (including user classes derived from BaseFunction) to registry
+    """
+    info = FunctionInfo(cls, min_dim, getattr(cls, 'b', None) if bound is None else bound, known_optimum, separable, modality, cost, takes_dim, random)
+    REGISTRY[info.name] = info
+    return info
+
+
+register(functions.Sphere, separable = True, modality = 'unimodal')
+register(functions.Ackley)
+register(functions.AckleyTest, min_dim = 2, known_optimum = False)
+register(functions.Rosenbrock, min_dim = 2, modality = 'unimodal')
+register(functions.Fletcher, cost = 'expensive', random = True)
+register(functions.Griewank)
+register(functions.Penalty2, min_dim = 2)
+register(functions.Quartic, separable = True, modality = 'unimodal')
+register(functions.Rastrigin, separable = True)
+register(functions.SchwefelDouble, modality = 'unimodal')
+register(functions.SchwefelMax, modality = 'unimodal')
+register(functions.SchwefelAbs, modality = 'unimodal')
+register(functions.SchwefelSin, separable = True)
+register(functions.Stairs, separable = True, modality = 'unimodal')
+register(functions.Abs, separable = True, modality = 'unimodal')
+register(functions.Michalewicz, bound = (0, np.pi), known_optimum = False, separable = True, takes_dim = False)
+register(functions.Scheffer, min_dim = 2)
+register(functions.Eggholder, min_dim = 2, known_optimum = False)
+register(functions.Weierstrass, separable = True, cost = 'moderate')
+
+
+def select(min_dim = None, separable = None, modality = None, cost = None, known_optimum = None):
+    """
+    returns names of registered functions with given properties (None means any)
+    """
+    return [
+        name for name, info in REGISTRY.items()
+        if (min_dim is None or info.min_dim <= min_dim)
+        and (separable is None or info.separable == separable)
+        and (modality is None or info.modality == modality)
+        and (cost is None or info.cost == cost)
+        and (known_optimum is None or info.known_optimum == known_optimum)
+    ]
+
+
+_instances = {}
+
+
+def make(name, dim, seed = None, dtype = np.float64, cached = True, **params):
+    """
+    Creates registered function by name
+
+    Parameters
+    ----------
+    name : str
+        name of function.
+    dim : int
+        dimension.
+    seed : int/None, optional
+        random seed for random functions (Fletcher), ignored by others. The default is None.
+    dtype : numpy float dtype, optional
+        dtype of function. The default is np.float64.
+    cached : boolean, optional
+        return the same object for the same (class, dim, params, seed, dtype), so repeated setups don't repeat
+        precomputations (Fletcher matrices...). Random functions with seed = None are never cached. The default is True.
+    **params :
+        other constructor parameters (for example, kmax of Weierstrass).
+
+    Returns
+    -------
+    function object (shared between calls if cached, so don't change it).
+
+    """
+    assert (name in REGISTRY), f"unknown function {name} (available: {list(REGISTRY)})"
+    info = REGISTRY[name]
+    assert (dim >= info.min_dim), f"{name} needs dim >= {info.min_dim} (got {dim})"
+
+    if info.random:
+        params['seed'] = seed
+    cached = cached and not (info.random and seed is None)
+
+    key = (info.cls, dim, tuple(sorted(params.items())), np.dtype(dtype).str)
+    if cached and key in _instances:
+        return _instances[key]
+
+    func = info.cls(dim, dtype = dtype, **params) if info.takes_dim else info.cls(dtype = dtype, **params)
+
+    if cached:
+        _instances[key] = func
+    return func
+
+
+def suite(dim, names = None, seed = None, dtype = np.float64, cached = True, params = None):
+    """
+    Creates dict name -> function object for all registered functions (or for names) available in dim
+
+    params is optional dict name -> dict of constructor parameters of this function
+    """
+    if names is None:
+        names = [name for name, info in REGISTRY.items() if info.min_dim <= dim]
+    params = {} if params is None else params
+
+    return {name: make(name, dim, seed = seed, dtype = dtype, cached = cached, **params.get(name, {})) for name in names}
+
+
+def clear_instances():
+    """
+    drops cached instances
+    """
+    _instances.clear()
@@ -0,0 +1,226 @@
+#
+# Rotations for Transformation objects
+#
+# Each rotation R is applied to points by rows: apply(arr) == arr @ R, apply_inverse(arr) == arr @ R.T
+# Structured rotations are applied in O(dim * k) without materializing dim x dim matrix
+#
+
+import copy
+import numpy as np
+
+from .shared import pack_state, unpack_state
+
+
+class Rotation:
+    """
+    base class of rotations
+    """
+
+    # names of float arrays which follow dtype
+    _tables = ()
+
+    def __getstate__(self):
+        # arrays in shared tables are pickled as references
+        return pack_state(self.__dict__)
+
+    def __setstate__(self, state):
+        self.__dict__.update(unpack_state(state))
+
+    def apply(self, arr):
+        raise NotImplementedError()
+
+    def apply_inverse(self, arr):
+        raise NotImplementedError()
+
+    def is_orthogonal(self):
+        raise NotImplementedError()
+
+    def astype(self, dtype):
+        """
+        returns copy of rotation with tables of dtype (or the same object if its dtype is already dtype)
+        """
+        dtype = np.dtype(dtype)
+        if self.dtype == dtype and all(getattr(self, name).dtype == dtype for name in self._tables):
+            return self
+
+        result = copy.copy(self)
+        for name in self._tables:
+            setattr(result, name, getattr(self, name).astype(dtype, copy = False))
+        result.dtype = np.dtype(dtype)
+        return result
+
+    def matrix(self):
+        """
+        materializes dim x dim matrix (only for small dims and checks)
+        """
+        return self.apply(np.eye(self.dim, dtype = self.dtype))
+
+
+class DenseRotation(Rotation):
+
+    _tables = ('R',)
+
+    def __init__(self, matrix, check = True):
+        """
+        dense orthogonal matrix
+
+        orthogonality is checked by random probes (R.T @ R @ P == P) in O(dim^2) instead of matrix inversion
+        """
+        self.R = np.asarray(matrix)
+        self.dim = self.R.shape[0]
+        self.dtype = self.R.dtype
+
+        if check:
+            assert self.is_orthogonal(), "Rotation matrix must be ortogonal!"
+
+    def apply(self, arr):
+        return arr @ self.R
+
+    def apply_inverse(self, arr):
+        return arr @ self.R.T
+
+    def is_orthogonal(self, probes = 8):
+        if self.R.ndim != 2 or self.R.shape[0] != self.R.shape[1]:
+            return False
+        P = np.random.RandomState(0).standard_normal((self.dim, probes))
+        return np.allclose(self.R.T @ (self.R @ P), P)
+
+    def matrix(self):
+        return self.R
+
+
+class HouseholderRotation(Rotation):
+
+    _tables = ('V',)
+
+    def __init__(self, dim, k = 4, seed = None, dtype = np.float64):
+        """
+        product of k random Householder reflections H = I - 2 v v.T, applied in O(dim * k) per point
+        (even k gives proper rotation, odd k -- rotation with reflection)
+        """
+        rng = np.random.default_rng(seed)
+
+        V = rng.standard_normal((k, dim))
+        self.V = (V / np.linalg.norm(V, axis = 1, keepdims = True)).astype(dtype)
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+
+    def _reflect(self, arr, v):
+        return arr - 2 * (arr @ v)[..., np.newaxis] * v
+
+    def apply(self, arr):
+        # arr @ H_1 @ H_2 @ ... @ H_k
+        for v in self.V:
+            arr = self._reflect(arr, v)
+        return arr
+
+    def apply_inverse(self, arr):
+        # reflections are symmetric and self-inverse
+        for v in self.V[::-1]:
+            arr = self._reflect(arr, v)
+        return arr
+
+    def is_orthogonal(self):
+        return np.allclose(np.linalg.norm(self.V, axis = 1), 1, atol = 1e-5 if self.dtype == np.float32 else 1e-8)
+
+
+class GivensRotation(Rotation):
+
+    _tables = ('cos', 'sin')
+
+    def __init__(self, dim, layers = 4, seed = None, dtype = np.float64):
+        """
+        sequence of layers of random Givens rotations; each layer rotates disjoint random pairs of coordinates
+        by random angles, so one layer is applied by a few vectorized operations in O(dim) per point
+        """
+        assert (dim >= 2), f"Givens rotations need dim >= 2 (got {dim})"
+
+        rng = np.random.default_rng(seed)
+
+        half = dim // 2
+        self.first = np.empty((layers, half), dtype = np.int64)
+        self.second = np.empty((layers, half), dtype = np.int64)
+        for layer in range(layers):
+            perm = rng.permutation(dim)
+            self.first[layer], self.second[layer] = perm[:half], perm[half:2*half]
+
+        angles = rng.uniform(0, 2*np.pi, (layers, half))
+        self.cos = np.cos(angles).astype(dtype)
+        self.sin = np.sin(angles).astype(dtype)
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+
+    def _rotate(self, arr, layer, sign):
+        i, j = self.first[layer], self.second[layer]
+        c, s = self.cos[layer], sign * self.sin[layer]
+
+        xi, xj = arr[..., i], arr[..., j]
+        arr = arr.copy()
+        arr[..., i] = c * xi - s * xj
+        arr[..., j] = s * xi + c * xj
+        return arr
+
+    def apply(self, arr):
+        for layer in range(self.cos.shape[0]):
+            arr = self._rotate(arr, layer, 1)
+        return arr
+
+    def apply_inverse(self, arr):
+        for layer in range(self.cos.shape[0] - 1, -1, -1):
+            arr = self._rotate(arr, layer, -1)
+        return arr
+
+    def is_orthogonal(self):
+        return np.allclose(self.cos**2 + self.sin**2, 1, atol = 1e-5 if self.dtype == np.float32 else 1e-8)
+
+
+class BlockDiagonalRotation(Rotation):
+
+    _tables = ('blocks', 'last_block')
+
+    def __init__(self, dim, block_size = 32, seed = None, dtype = np.float64):
+        """
+        block-diagonal matrix of random dense orthogonal blocks of block_size (the last block can be smaller),
+        applied in O(dim * block_size) per point
+        """
+        rng = np.random.default_rng(seed)
+
+        def random_orthogonal(size):
+            q, r = np.linalg.qr(rng.standard_normal((size, size)))
+            return q * np.sign(np.diag(r))
+
+        count, rest = divmod(dim, block_size)
+        self.blocks = np.array([random_orthogonal(block_size) for _ in range(count)]).reshape(count, block_size, block_size).astype(dtype)
+        self.last_block = random_orthogonal(rest).astype(dtype) if rest else np.empty((0, 0), dtype = dtype)
+        self.block_size = block_size
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+
+    def _apply(self, arr, inverse):
+
+        count = self.blocks.shape[0]
+        full = count * self.block_size
+
+        result = np.empty_like(arr)
+        if count:
+            parts = arr[..., :full].reshape(arr.shape[:-1] + (count, self.block_size))
+            subscripts = '...ki,kji->...kj' if inverse else '...ki,kij->...kj'
+            result[..., :full] = np.einsum(subscripts, parts, self.blocks).reshape(arr.shape[:-1] + (full,))
+        if self.last_block.size:
+            result[..., full:] = arr[..., full:] @ (self.last_block.T if inverse else self.last_block)
+        return result
+
+    def apply(self, arr):
+        return self._apply(arr, False)
+
+    def apply_inverse(self, arr):
+        return self._apply(arr, True)
+
+    def is_orthogonal(self):
+        atol = 1e-5 if self.dtype == np.float32 else 1e-8
+        eye = np.eye(self.block_size)
+        return (
+            np.allclose(np.einsum('kji,kjl->kil', self.blocks, self.blocks), eye, atol = atol) and
+            np.allclose(self.last_block.T @ self.last_block, np.eye(self.last_block.shape[0]), atol = atol)
+        )
+
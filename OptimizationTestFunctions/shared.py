@@ -0,0 +1,238 @@
+#
+# Shared-memory (or file-backed mmap) tables of function objects
+#
+# Arrays of objects shared by SharedTables are pickled as small references (name, shape, dtype),
+# so worker processes attach them zero-copy instead of receiving own copies
+#
+
+import os
+import shutil
+import weakref
+
+import numpy as np
+
+
+class _SharedRef:
+    """
+    picklable reference to shared array
+    """
+    def __init__(self, kind, name, shape, dtype, offset = 0):
+        self.kind = kind # 'shm' or 'mmap'
+        self.name = name # name of shared memory block or path of file
+        self.shape = shape
+        self.dtype = dtype
+        self.offset = offset
+
+
+# id(array) -> (weak reference of array, reference) for arrays in shared memory or files of this process
+_registry = {}
+
+# shared memory blocks attached by this process (workers keep them while they live)
+_attached = {}
+
+
+def _attach(name):
+    # multiprocessing is imported only when shared memory is used: this module is imported by pickling hooks of all objects
+    from multiprocessing import resource_tracker, shared_memory
+    try:
+        return shared_memory.SharedMemory(name = name, track = False)
+    except TypeError:
+        # python < 3.13: buffers are owned by creator process, so other processes should not register them in resource tracker
+        register = resource_tracker.register
+        resource_tracker.register = lambda *args: None
+        try:
+            return shared_memory.SharedMemory(name = name)
+        finally:
+            resource_tracker.register = register
+
+
+def _register(arr, ref):
+    arr.flags.writeable = False
+    key = id(arr)
+    _registry[key] = (weakref.ref(arr, lambda _: _registry.pop(key, None)), ref)
+    return arr
+
+
+def _open(ref):
+    """
+    attaches array by reference
+    """
+    if ref.kind == 'shm':
+        if ref.name not in _attached:
+            _attached[ref.name] = _attach(ref.name)
+        arr = np.ndarray(ref.shape, dtype = ref.dtype, buffer = _attached[ref.name].buf)
+    else:
+        arr = np.memmap(ref.name, dtype = ref.dtype, mode = 'r', shape = ref.shape, offset = ref.offset)
+    return _register(arr, ref)
+
+
+def pack_state(state):
+    """
+    replaces shared arrays of object state (dict of attributes) by references for pickling
+    """
+    packed = {}
+    for name, value in state.items():
+        item = _registry.get(id(value))
+        packed[name] = item[1] if item is not None and item[0]() is value else value
+    return packed
+
+
+def unpack_state(state):
+    """
+    replaces references of unpickled object state by attached arrays
+    """
+    return {name: _open(value) if isinstance(value, _SharedRef) else value for name, value in state.items()}
+
+
+def _package_object(obj):
+    return hasattr(obj, '__dict__') and type(obj).__module__.startswith(__package__ + '.')
+
+
+def _release(blocks, files, directory):
+
+    for shm in blocks:
+        try:
+            shm.close()
+        except BufferError:
+            # some arrays still use the block: memory is freed when they are removed
+            pass
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+    for path in files:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    if directory is not None:
+        shutil.rmtree(directory, ignore_errors = True)
+
+
+class SharedTables:
+
+    def __init__(self, backing = 'shm', directory = None, min_bytes = 2**16):
+        """
+        Owner of named shared memory blocks (or mmap files) with large tables of function objects
+        (Fletcher matrices, rotation matrices, shift vectors...)
+
+        Parameters
+        ----------
+        backing : str, optional
+            'shm' for named shared memory or 'mmap' for files (for example, on tmpfs or disk). The default is 'shm'.
+        directory : str/None, optional
+            directory of files of 'mmap' backing. The default is None (new temporary directory removed by close).
+        min_bytes : int, optional
+            smaller arrays are pickled as usual. The default is 2**16.
+
+        Tables are released by close() (or at exit): shared objects get back private copies of arrays
+        (memory-mapped arrays get back their original memmaps).
+        """
+        assert (backing in ('shm', 'mmap')), f"backing should be 'shm' or 'mmap' (got {backing})"
+
+        self.backing = backing
+        self.min_bytes = min_bytes
+
+        own_directory = None
+        if backing == 'mmap' and directory is None:
+            import tempfile
+            directory = own_directory = tempfile.mkdtemp(prefix = 'shared_tables_')
+        self.directory = directory
+
+        self.blocks = []
+        self.files = []
+        self.replaced = [] # (object, attribute name, shared array, original file-backed array or None)
+
+        self._finalizer = weakref.finalize(self, _release, self.blocks, self.files, own_directory)
+
+    @property
+    def nbytes(self):
+        return sum(arr.nbytes for _, _, arr, _ in self.replaced)
+
+    def _share_array(self, arr):
+
+        if isinstance(arr, np.memmap) and arr.filename is not None and arr.flags.c_contiguous:
+            # already file-backed: only reference to the file is pickled
+            ref = _SharedRef('mmap', arr.filename, arr.shape, arr.dtype, arr.offset)
+            view = np.memmap(arr.filename, dtype = arr.dtype, mode = 'r', shape = arr.shape, offset = arr.offset)
+            return _register(view, ref)
+
+        if self.backing == 'shm':
+            from multiprocessing import shared_memory
+            shm = shared_memory.SharedMemory(create = True, size = max(1, arr.nbytes))
+            self.blocks.append(shm)
+            shared = np.ndarray(arr.shape, dtype = arr.dtype, buffer = shm.buf)
+            ref = _SharedRef('shm', shm.name, arr.shape, arr.dtype)
+        else:
+            path = os.path.join(self.directory, f'table_{os.getpid()}_{len(self.files)}.dat')
+            self.files.append(path)
+            shared = np.memmap(path, dtype = arr.dtype, mode = 'w+', shape = arr.shape)
+            ref = _SharedRef('mmap', path, arr.shape, arr.dtype)
+
+        shared[...] = arr
+        if isinstance(shared, np.memmap):
+            shared.flush()
+        return _register(shared, ref)
+
+    def share(self, func):
+        """
+        moves large arrays of function object (and of objects inside it: transformed function, rotation) into shared tables,
+        returns the same object
+        """
+        assert self._finalizer.alive, "tables are closed!"
+
+        seen = set()
+
+        def walk(obj):
+            if id(obj) in seen or not _package_object(obj):
+                return
+            seen.add(id(obj))
+
+            for name, value in list(vars(obj).items()):
+                if isinstance(value, np.ndarray):
+                    if value.nbytes >= self.min_bytes and id(value) not in _registry:
+                        shared = self._share_array(value)
+                        setattr(obj, name, shared)
+                        # file-backed arrays are restored as they are, others are copied back from shared memory
+                        original = value if isinstance(value, np.memmap) else None
+                        self.replaced.append((obj, name, shared, original))
+                elif _package_object(value):
+                    walk(value)
+
+            if hasattr(obj, '_build_maps'):
+                # closures of Transformation should use shared arrays
+                obj._build_maps()
+
+        walk(func)
+        return func
+
+    def close(self):
+        """
+        gives private copies of arrays back to shared objects and releases shared memory and files
+        """
+        if not self._finalizer.alive:
+            return
+
+        replaced, self.replaced = self.replaced, []
+        objects = []
+        shared = None
+        while replaced:
+            # views of shared memory should be dropped before closing of blocks
+            obj, name, shared, original = replaced.pop()
+            _registry.pop(id(shared), None)
+            if getattr(obj, name, None) is shared:
+                setattr(obj, name, np.array(shared) if original is None else original)
+            objects.append(obj)
+        del shared
+        for obj in objects:
+            if hasattr(obj, '_build_maps'):
+                obj._build_maps()
+
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
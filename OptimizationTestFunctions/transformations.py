@@ -1,20 +1,94 @@
+import functools
 import warnings
 import numpy as np
 
+from .evaluation import evaluate_population
+from .rotations import Rotation, DenseRotation
+from .shared import pack_state, unpack_state
+
+
+class VectorizedNoise:
+    """
+    noise generator with own random stream (numpy Generator) which noises scalar value or whole array of values by one call
+    """
+    def __init__(self, apply, seed = None):
+        self.apply = apply # (generator, values array) -> noised values array
+        self.seed(seed)
+
+    def seed(self, seed = None):
+        """
+        restarts random stream from int seed or SeedSequence (None means fresh entropy)
+        """
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.rng = np.random.default_rng(self.seed_sequence)
+
+    def spawn(self, n):
+        """
+        creates n noise generators of the same model with independent random streams (for example, for parallel workers)
+        """
+        return [VectorizedNoise(self.apply, sequence) for sequence in self.seed_sequence.spawn(n)]
+
+    def __call__(self, value):
+        value = np.asarray(value)
+        # noised values follow float dtype of values
+        return np.asarray(self.apply(self.rng, value), dtype = value.dtype if value.dtype.kind == 'f' else np.float64)[()]
+
+
+def _uniform(low, high, rng, value):
+    return value + rng.uniform(low, high, value.shape)
+
+def _normal(center, sd, rng, value):
+    return value + rng.normal(center, sd, value.shape)
+
+def _multiplicative(sd, rng, value):
+    return value * (1 + rng.normal(0, sd, value.shape))
+
+def _student(df, scale, rng, value):
+    return value + scale * rng.standard_t(df, value.shape)
+
+def _heteroscedastic(sd, relative_sd, rng, value):
+    return value + rng.standard_normal(value.shape) * (sd + relative_sd * np.abs(value))
+
+
 class Noises:
     @staticmethod
-    def uniform(low = 0, high = 0.1):
-        return lambda value: value + np.random.uniform(low = low, high = high)
+    def uniform(low = 0, high = 0.1, seed = None):
+        return VectorizedNoise(functools.partial(_uniform, low, high), seed)
+
+    @staticmethod
+    def normal(center = 0, sd = 0.1, seed = None):
+        return VectorizedNoise(functools.partial(_normal, center, sd), seed)
+
+    @staticmethod
+    def multiplicative(sd = 0.1, seed = None):
+        """
+        value * (1 + N(0, sd))
+        """
+        return VectorizedNoise(functools.partial(_multiplicative, sd), seed)
 
     @staticmethod
-    def normal(center = 0, sd = 0.1):
-        return lambda value: value + np.random.normal(loc = center, scale = sd)
+    def student(df = 3, scale = 0.1, seed = None):
+        """
+        heavy-tailed noise: value + scale * t(df)
+        """
+        return VectorizedNoise(functools.partial(_student, df, scale), seed)
+
+    @staticmethod
+    def heteroscedastic(sd = 0.1, relative_sd = 0.1, seed = None):
+        """
+        normal noise with standard deviation growing with value: value + N(0, 1) * (sd + relative_sd * |value|)
+        """
+        return VectorizedNoise(functools.partial(_heteroscedastic, sd, relative_sd), seed)
+
 
 
+# closures of Transformation which are created by _build_maps
+_MAPS = ('shifter', 'unshifter', 'rotator', 'unrotator', 'f')
+
 
 class Transformation:
 
-    def __init__(self, transformed_function, shift_step = None, rotation_matrix = None, noise_generator = None, seed = None):
+    def __init__(self, transformed_function, shift_step = None, rotation_matrix = None, noise_generator = None, seed = None, dtype = None):
         """
         Creates Transformation object
 
@@ -24,80 +98,185 @@ class Transformation:
             transformed function.
         shift_step : numpy 1D array/None, optional
             array of shifts by each dimension or None. The default is None.
-        rotation_matrix : 2D-array/int/None, optional
-            2D ortogonal rotation matrix or dimension for creating random rotation matrix or None if no rotate. The default is None.
+        rotation_matrix : 2D-array/Rotation/int/None, optional
+            2D ortogonal rotation matrix, structured rotation object from rotations module (HouseholderRotation, GivensRotation, BlockDiagonalRotation)
+            or dimension for creating random rotation matrix or None if no rotate. The default is None.
         noise_generator : function, optional
             function gets current value and returns value with some noise. The default is None.
+            Noises from `Noises` class are drawn for whole population by one call, other functions are applied value by value.
         seed : int, optional
-            random seed for rotation matrix if needed reproduce. The default is None.
+            random seed for rotation matrix if needed reproduce (global numpy random state is not changed). The default is None.
+        dtype : numpy float dtype/None, optional
+            dtype of shift, rotation matrix and computations. The default is None (dtype of transformed function or np.float64).
 
         """
-        if not (seed is None):
-            np.random.seed(seed)
+        rng = np.random if seed is None else np.random.RandomState(seed)
 
         self.is_noised = not (noise_generator is None)
         self.is_rotated = not (rotation_matrix is None)
         self.is_shifted = not (shift_step is None)
 
+        self.transformed_function = transformed_function
+        self.dtype = np.dtype(getattr(transformed_function, 'dtype', np.float64) if dtype is None else dtype)
+        # affine map arr -> rotation.apply(arr) + bias (None means identity/zero)
+        self.rotation = None
+        self.bias = None
+
         self.bounds = transformed_function.bounds
         if self.is_shifted:
             xmin, xmax, ymin, ymax = self.bounds
             self.bounds = xmin + shift_step[0], xmax + shift_step[0], ymin + shift_step[1], ymax + shift_step[1]
         #raise Exception()
+        self.shift_step = None
+        self.noiser = None
+
         if (shift_step is None) and (rotation_matrix is None) and (noise_generator) is None:
             warnings.warn("No sense of transformation when all preparations are None!")
-            self.f = lambda arr: transformed_function(arr)
+            self._build_maps()
 
             return
-        
-        empty_func = lambda arr: arr
 
         if self.is_shifted:
             
             assert (type(shift_step) == np.ndarray), "shift_step must be numpy array or None!"
+            self.shift_step = shift_step.astype(self.dtype)
 
-            self.shifter = lambda arr: arr - shift_step
-            self.unshifter = lambda arr: arr + shift_step
-        else:
-            self.shifter = empty_func
-            self.unshifter = empty_func
+            self.bias = -self.shift_step
         
 
         if self.is_rotated:
-            if type(rotation_matrix) == np.ndarray:
+            if isinstance(rotation_matrix, Rotation):
 
-                assert (np.allclose(rotation_matrix.T, np.linalg.inv(rotation_matrix))), f"Rotation matrix must be ortogonal!"
+                assert rotation_matrix.is_orthogonal(), f"Rotation must be ortogonal!"
+                rotation = rotation_matrix
+            elif type(rotation_matrix) == np.ndarray:
 
-                # create rotator
-                self.rotator = lambda arr: arr.dot(rotation_matrix)
+                rotation = DenseRotation(rotation_matrix)
             else:
-                assert (type(rotation_matrix) == int), "rotation_matrix is not int dim and not a matrix!"
+                assert (type(rotation_matrix) == int), "rotation_matrix is not int dim, matrix or Rotation object!"
                 # init rotator
-                rotation_matrix, _ = np.linalg.qr(np.random.random((rotation_matrix, rotation_matrix)), mode='complete')
-                self.rotator = lambda arr: arr.dot(rotation_matrix)
-                self.unrotator = lambda arr: arr.dot(rotation_matrix.T)
+                rotation_matrix, _ = np.linalg.qr(rng.random_sample((rotation_matrix, rotation_matrix)), mode='complete')
+                rotation = DenseRotation(rotation_matrix, check = False)
+
+            # (arr - shift) @ R == arr @ R - shift @ R
+            self.rotation = rotation.astype(self.dtype)
+            if self.is_shifted:
+                self.bias = self.rotation.apply(self.bias)
         else:
-            self.rotator = empty_func
-            self.unrotator = empty_func
             self.is_rotated = False
 
         
-        self.noiser = (lambda val: val) if noise_generator is None else noise_generator
+        self.noiser = noise_generator
 
-        self.f = lambda arr: self.noiser(transformed_function(self.rotator(self.shifter(arr))))
+        self._build_maps()
 
         self.x_best = None
         self.f_best = None
 
         if not self.is_noised and hasattr(transformed_function, 'x_best'):
             if not (transformed_function.x_best is None):
-                self.x_best = self.unrotator(self.unshifter(transformed_function.x_best))
-                self.f_best = transformed_function(self.x_best)
+                self.x_best = self.unshifter(self.unrotator(transformed_function.x_best))
+                self.f_best = self.f(self.x_best)
+
+
+    def _build_maps(self):
+        """
+        creates shift and rotation maps and function of point from shift_step, rotation and noiser
 
+        they are closures, so they are not pickled but created again after unpickling
+        """
+        empty_func = lambda arr: arr
+        shift_step, rotation, transformed_function = self.shift_step, self.rotation, self.transformed_function
+
+        if shift_step is not None:
+            self.shifter = lambda arr: arr - shift_step
+            self.unshifter = lambda arr: arr + shift_step
+        else:
+            self.shifter = empty_func
+            self.unshifter = empty_func
+
+        if rotation is not None:
+            self.rotator = rotation.apply
+            self.unrotator = rotation.apply_inverse
+        else:
+            self.rotator = empty_func
+            self.unrotator = empty_func
+
+        self.f = lambda arr: transformed_function(self.rotator(self.shifter(arr)))
+        if self.noiser is not None:
+            self.f = lambda arr: self.noiser(transformed_function(self.rotator(self.shifter(arr))))
+
+    def __getstate__(self):
+        return pack_state({name: value for name, value in self.__dict__.items() if name not in _MAPS})
+
+    def __setstate__(self, state):
+        self.__dict__.update(unpack_state(state))
+        self._build_maps()
 
     def __call__(self, arr):
+        arr = np.asarray(arr, dtype = self.dtype)
+        if arr.ndim == 2:
+            return self.evaluate_batch(arr)
         return self.f(arr)
 
+    def affine(self, arr):
+        """
+        applies shift and rotation to point (1D-array) or population (2D-array)
+        """
+        if self.rotation is not None:
+            arr = self.rotation.apply(arr)
+        if self.bias is not None:
+            arr = arr + self.bias
+        return arr
+
+    def grad(self, arr):
+        """
+        gradient of transformed function for point (1D-array) or population (2D-array)
+        """
+        return self.value_and_grad(arr)[1]
+
+    def value_and_grad(self, arr):
+        """
+        returns value and gradient using analytic gradient of transformed function and chain rule through rotation;
+        noise is applied to values only
+        """
+        arr = np.asarray(arr, dtype = self.dtype)
+
+        values, grads = self.transformed_function.value_and_grad(self.affine(arr))
+
+        if self.rotation is not None:
+            # d/dx f(x @ R + bias) = R @ grad f
+            grads = self.rotation.apply_inverse(grads)
+
+        if self.noiser is not None:
+            values = self.add_noise(values) if arr.ndim == 2 else self.noiser(values)
+
+        return values, grads
+
+    def add_noise(self, values):
+        """
+        adds noise to 1D-array of values (as one array for `Noises`, value by value for other noise functions)
+        """
+        if self.noiser is None:
+            return values
+        if isinstance(self.noiser, VectorizedNoise):
+            return self.noiser(values)
+        return np.array([self.noiser(val) for val in values], dtype = values.dtype)
+
+    def evaluate_batch(self, arr, noised = True):
+        """
+        evaluates transformed function on each row of 2D-array (n_points, dim)
+
+        shift and rotation are applied as one affine map (rotation plus bias) for whole population,
+        then population goes to batched path of transformed function and noise is added as one array (if noised)
+        """
+        arr = np.asarray(arr, dtype = self.dtype)
+        assert (arr.ndim == 2), f"population should be 2D-array with shape (n_points, dim) (got shape {arr.shape})"
+
+        values = evaluate_population(self.transformed_function, self.affine(arr))
+
+        return self.add_noise(values) if noised else values
+
 
 
 
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput benchmarks of test functions (plain and wrapped in Transformation) for float64/float32 dtypes
+
+Usage:
+    python run_benchmarks.py                      # run and compare with baseline.json if it exists
+    python run_benchmarks.py --save               # run and save results as new baseline
+    python run_benchmarks.py --quick              # small dims and batches only
+    python run_benchmarks.py --functions Sphere Fletcher --dims 2 100 --batches 1 1000 --threshold 0.3
+    python run_benchmarks.py --quick --dtypes float64 float32   # float32 vs float64 throughput and accuracy
+
+Exit code is 1 if some case is slower than baseline by more than threshold.
+"""
+
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import argparse
+import json
+import platform
+import time
+import tracemalloc
+
+import numpy as np
+
+from OptimizationTestFunctions import Transformation
+from OptimizationTestFunctions.registry import REGISTRY, make
+
+
+DIMS = [2, 10, 100, 1000, 10000, 100000]
+BATCHES = [1, 10, 100, 1000, 10000, 100000]
+
+QUICK_DIMS = [2, 10, 100]
+QUICK_BATCHES = [1, 100, 1000]
+
+
+def make_function(name, variant, dim, max_rotation_dim, dtype):
+
+    # instances are not cached, so memory of large functions is released after each case
+    func = make(name, dim, seed = 1, dtype = dtype, cached = False)
+
+    if variant == 'plain':
+        return func
+
+    # shift + rotation like CEC benchmarks, rotation matrix is dim x dim so it is used only for moderate dims
+    return Transformation(func,
+                          shift_step = np.full(dim, 0.1),
+                          rotation_matrix = dim if dim <= max_rotation_dim else None,
+                          seed = 1)
+
+
+def measure(func, population, min_time):
+    """
+    returns best evaluations/sec from several repeats and peak traced memory (bytes) of one call
+    """
+    n = population.shape[0]
+    call = (lambda: func(population[0])) if n == 1 else (lambda: func(population))
+
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = 0
+    for _ in range(3):
+        count = 0
+        start = time.perf_counter()
+        while True:
+            call()
+            count += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, count * n / elapsed)
+
+    return best, peak
+
+
+def run(functions, variants, dims, batches, dtypes, max_elements, max_rotation_dim, max_fletcher_dim, min_time):
+
+    results = {}
+
+    for name in functions:
+        for dim in dims:
+            if name == 'Fletcher' and dim > max_fletcher_dim:
+                print(f"skip {name} dim={dim}: dim x dim matrices are too large")
+                continue
+
+            for variant in variants:
+                funcs = {dtype: make_function(name, variant, dim, max_rotation_dim, dtype) for dtype in dtypes}
+                # float64 values are reference for accuracy of other dtypes
+                reference = funcs['float64'] if 'float64' in funcs else make_function(name, variant, dim, max_rotation_dim, 'float64')
+
+                for n in batches:
+                    if n * dim > max_elements:
+                        continue
+
+                    population = np.random.uniform(-1, 1, (n, dim))
+                    expected = reference(population).astype(np.float64)
+
+                    for dtype, func in funcs.items():
+                        evals_per_sec, peak = measure(func, population.astype(dtype), min_time)
+
+                        error = 0.0
+                        if dtype != 'float64':
+                            error = float(np.max(np.abs(func(population.astype(dtype)) - expected) / np.maximum(1, np.abs(expected))))
+
+                        key = f"{name}|{variant}|{dtype}|dim={dim}|batch={n}"
+                        results[key] = {'evals_per_sec': evals_per_sec, 'peak_bytes': peak, 'max_rel_error': error}
+                        print(f"{key:<53} {evals_per_sec:>14.1f} evals/sec {peak/2**20:>10.2f} MB   max rel error {error:.2e}")
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    returns list of cases slower than baseline by more than threshold
+    """
+    slower = []
+    for key, res in results.items():
+        if key not in baseline:
+            continue
+        old = baseline[key]['evals_per_sec']
+        if res['evals_per_sec'] < old * (1 - threshold):
+            slower.append((key, old, res['evals_per_sec']))
+    return slower
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description = 'throughput benchmarks of OptimizationTestFunctions')
+    parser.add_argument('--functions', nargs = '+', default = list(REGISTRY))
+    parser.add_argument('--variants', nargs = '+', default = ['plain', 'transformed'], choices = ['plain', 'transformed'])
+    parser.add_argument('--dims', nargs = '+', type = int, default = None)
+    parser.add_argument('--batches', nargs = '+', type = int, default = None)
+    parser.add_argument('--dtypes', nargs = '+', default = ['float64'], choices = ['float64', 'float32'])
+    parser.add_argument('--quick', action = 'store_true', help = 'use small dims and batches')
+    parser.add_argument('--max-elements', type = int, default = 10**7, help = 'skip cases with batch * dim greater than it')
+    parser.add_argument('--max-rotation-dim', type = int, default = 2000)
+    parser.add_argument('--max-fletcher-dim', type = int, default = 5000)
+    parser.add_argument('--min-time', type = float, default = 0.05, help = 'min seconds of each repeat')
+    parser.add_argument('--baseline', default = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json'))
+    parser.add_argument('--threshold', type = float, default = 0.25, help = 'allowed relative slowdown')
+    parser.add_argument('--save', action = 'store_true', help = 'save results as new baseline')
+    args = parser.parse_args()
+
+    np.random.seed(0)
+
+    dims = args.dims or (QUICK_DIMS if args.quick else DIMS)
+    batches = args.batches or (QUICK_BATCHES if args.quick else BATCHES)
+
+    results = run(args.functions, args.variants, dims, batches, args.dtypes,
+                  args.max_elements, args.max_rotation_dim, args.max_fletcher_dim, args.min_time)
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump({
+                'machine': {'platform': platform.platform(), 'python': platform.python_version(), 'numpy': np.__version__},
+                'results': results
+            }, f, indent = 1)
+        print(f"baseline saved to {args.baseline}")
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline file {args.baseline}, use --save to create it")
+        sys.exit(0)
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+
+    slower = compare(results, baseline, args.threshold)
+    for key, old, new in slower:
+        print(f"SLOWER {key}: {old:.1f} -> {new:.1f} evals/sec ({100*(1 - new/old):.1f}%)")
+
+    sys.exit(1 if slower else 0)
+
@@ -23,7 +23,11 @@ setuptools.setup(
         "Operating System :: OS Independent",
         "Topic :: Software Development :: Libraries :: Python Modules",
     ],
-    install_requires=['numpy', 'matplotlib', 'OppOpPopInit']
+    install_requires=['numpy'],
+    extras_require={
+        'plot': ['matplotlib', 'OppOpPopInit'],
+        'jit': ['numba']
+    }
     
     )
 
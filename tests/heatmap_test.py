@@ -2,31 +2,12 @@ import sys
 sys.path.append('..')
 
 
-from OptimizationTestFunctions import Sphere, Ackley, AckleyTest, Rosenbrock, Fletcher, Griewank, Penalty2, Quartic, Rastrigin, SchwefelDouble, SchwefelMax, SchwefelAbs, SchwefelSin, Stairs, Abs, Michalewicz, Scheffer, Eggholder, Weierstrass, plot_3d
+from OptimizationTestFunctions import plot_3d
+from OptimizationTestFunctions.registry import suite
 
 dim = 2
 
-funcs = [
-        Sphere(dim, degree = 2),
-        Ackley(dim),
-        AckleyTest(dim),
-        Rosenbrock(dim),
-        Fletcher(dim, seed = 1488),
-        Griewank(dim),
-        Penalty2(dim),
-        Quartic(dim),
-        Rastrigin(dim),
-        SchwefelDouble(dim),
-        SchwefelMax(dim),
-        SchwefelAbs(dim),
-        SchwefelSin(dim),
-        Stairs(dim),
-        Abs(dim),
-        Michalewicz(),
-        Scheffer(dim),
-        Eggholder(dim),
-        Weierstrass(dim)
-    ]
+funcs = list(suite(dim, seed = 1488).values())
 
 for f in funcs:
     plot_3d(f, 